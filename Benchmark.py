@@ -0,0 +1,290 @@
+# Benchmark.py
+"""Headless benchmark of the painter pipeline (no camera, no Kivy window).
+
+Replays a video file, or a synthetic generator, through the same stages as
+VirtualPainterScreen._update: mirror/scale, hand detection, landmark
+tracking, stroke rendering, compositing and text drawing. Prints
+throughput, per-stage latency percentiles and peak memory, and can save
+the result as a baseline or compare against one.
+
+    python Benchmark.py --video clip.mp4 --save-baseline base.json
+    python Benchmark.py --synthetic 600 --compare base.json
+    python Benchmark.py --video clip.mp4 --record clip.lms
+    python Benchmark.py --replay clip.lms --loops 20
+"""
+import argparse
+import json
+import math
+import resource
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+import HandTrackingModule as htm
+from BufferPool import FramePool
+from CameraModule import MirrorScaler
+from Compositor import OverlayCompositor
+from KeyboardInput import KeyboardInput
+from LandmarkStream import LandmarkRecorder, replayHandDetector
+from PerfMonitor import PerfMonitor
+from StrokeCanvas import StrokeCanvas
+
+
+# --------- Frame sources ----------
+def video_frames(path, limit=None):
+    """BGR frames from a video file"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video: {path}")
+    count = 0
+    try:
+        while limit is None or count < limit:
+            ok, img = cap.read()
+            if not ok:
+                break
+            count += 1
+            yield img
+    finally:
+        cap.release()
+
+
+def synthetic_frames(count, width=1280, height=720, seed=0):
+    """Noisy, slowly moving frames at camera size (no hands in them)"""
+    rng = np.random.default_rng(seed)
+    base = rng.integers(40, 200, (height, width, 3), dtype=np.uint8)
+    base = cv2.GaussianBlur(base, (0, 0), 8)
+    img = np.empty_like(base)
+    for i in range(count):
+        np.copyto(img, base)
+        cx = int(width / 2 + width / 3 * math.sin(i / 30.0))
+        cv2.circle(img, (cx, height // 2), 80, (90, 140, 200), -1)
+        yield img
+
+
+def blank_frames(count, width=1024, height=600):
+    """The same gray frame over and over, for landmark replays"""
+    img = np.full((height, width, 3), 128, np.uint8)
+    for _ in range(count):
+        yield img
+
+
+class ScriptedHand:
+    """Fake hand that traces a figure eight with the index finger.
+
+    Used with synthetic frames (which contain no real hands) so stroke
+    rendering and compositing still get a realistic load. Lifts the pen
+    for a few frames every `stroke_len` frames.
+    """
+
+    def __init__(self, width, height, stroke_len=90, hand_id=1000):
+        self.width = width
+        self.height = height
+        self.stroke_len = stroke_len
+        self.hand_id = hand_id
+        self.frame = 0
+        self.lm = np.zeros((21, 3), np.int32)
+        self.lm[:, 0] = np.arange(21)
+
+    def next(self):
+        t = self.frame / 20.0
+        self.frame += 1
+        self.lm[8, 1] = int(self.width * (0.5 + 0.35 * math.sin(t)))
+        self.lm[8, 2] = int(self.height * (0.5 + 0.3 * math.sin(2 * t)))
+        pen_down = self.frame % self.stroke_len > 5
+        fingers = [0, 1, 0, 0, 0] if pen_down else [0, 0, 0, 0, 0]
+        return {'id': self.hand_id, 'type': 'Right', 'score': 1.0,
+                'lm': self.lm, 'fingers': fingers}
+
+
+# --------- Pipeline ----------
+class HeadlessPainter:
+    """The per-frame work of VirtualPainterScreen, without Kivy"""
+
+    def __init__(self, detector, width=1024, height=600, perf=None, scripted=None, texts=3,
+                 recorder=None):
+        self.width, self.height = width, height
+        self.recorder = recorder
+        self.pool = FramePool()
+        self.detector = detector
+        self.scaler = MirrorScaler(width, height)
+        self.strokes = StrokeCanvas(width, height)
+        self.compositor = OverlayCompositor(threshold=50, pool=self.pool)
+        self.keyboard = KeyboardInput()
+        self.perf = perf or PerfMonitor(window=100000)
+        self.scripted = scripted
+        self.drawColor = (255, 0, 255)
+        self.brushSize = 15
+        self.frame_allocations = []
+        for i in range(texts):
+            self.keyboard.text = f"Benchmark text {i}"
+            self.keyboard.current_input_position = (80 + 120 * i, 120 + 140 * i)
+            self.keyboard.add_text_object()
+        self.keyboard.text = ""
+
+    def _handle_hand(self, hand):
+        hid, lm, fingers = hand['id'], hand['lm'], hand['fingers']
+        x1, y1 = int(lm[8, 1]), int(lm[8, 2])
+        if fingers[1] and fingers[2]:
+            self.strokes.end_stroke(hid)
+            if self.keyboard.dragging or self.keyboard.check_drag_start(x1, y1):
+                self.keyboard.update_drag(x1, y1)
+            return
+        if self.keyboard.dragging:
+            self.keyboard.end_drag()
+        if fingers[1]:
+            if not self.strokes.is_drawing(hid):
+                self.strokes.begin_stroke(hid, self.drawColor, self.brushSize)
+            self.strokes.add_point(hid, x1, y1)
+        else:
+            self.strokes.end_stroke(hid)
+
+    def process(self, raw):
+        perf = self.perf
+        perf.start()
+        self.frame_allocations.append(self.pool.next_frame())
+        img = self.scaler.apply(raw, self.pool.get('bench.frame', (self.height, self.width, 3)))
+        perf.lap('capture')
+
+        self.detector.findHands(img, draw=False)
+        if self.recorder is not None:
+            self.recorder.write(self.detector)
+        perf.lap('detect')
+        hands = self.detector.findAllHands(img)
+        if self.scripted is not None:
+            hands = hands + [self.scripted.next()]
+        perf.lap('landmarks')
+        for hand in hands:
+            self._handle_hand(hand)
+        active = {hand['id'] for hand in hands}
+        for hid in self.strokes.active_keys():
+            if hid not in active:
+                self.strokes.end_stroke(hid)
+        perf.lap('strokes')
+
+        self.compositor.update(self.strokes.canvas, self.strokes.take_dirty())
+        out = self.compositor.composite(img, self.strokes.canvas)
+        perf.lap('composite')
+        self.keyboard.draw(out)
+        perf.lap('text')
+        perf.end_frame()
+        return out
+
+
+# --------- Running ----------
+def run(frames, painter, warmup=10):
+    """Push frames through painter; returns the result dict"""
+    tracemalloc.start()
+    count = 0
+    start = None
+    for raw in frames:
+        if count == warmup:
+            # Don't let model loading and first-touch allocations skew results
+            painter.perf = PerfMonitor(window=100000)
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+        painter.process(raw)
+        count += 1
+    elapsed = time.perf_counter() - start if start else 0.0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    measured = max(0, count - warmup)
+    return {
+        'frames': measured,
+        'seconds': round(elapsed, 3),
+        'fps': round(measured / elapsed, 2) if elapsed else 0.0,
+        'stages': painter.perf.summary(),
+        'peak_traced_mb': round(peak / 2 ** 20, 2),
+        # ru_maxrss is in KiB on Linux
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 2),
+        'allocations_after_warmup': int(sum(painter.frame_allocations[warmup + 1:])),
+    }
+
+
+def report(result):
+    print(f"{result['frames']} frames in {result['seconds']} s -> {result['fps']} fps")
+    print(f"peak traced {result['peak_traced_mb']} MB, max RSS {result['max_rss_mb']} MB, "
+          f"{result['allocations_after_warmup']} buffer allocations after warm-up")
+    print(f"{'stage':<10}{'p50':>8}{'p95':>8}{'p99':>8} ms")
+    for name, s in result['stages'].items():
+        print(f"{name:<10}{s['p50']:8.2f}{s['p95']:8.2f}{s['p99']:8.2f}")
+
+
+def compare(result, baseline, tolerance=0.10):
+    """Print changes against a baseline; returns the names that got slower than tolerance"""
+    slower = []
+    print(f"fps: {baseline['fps']} -> {result['fps']}")
+    if baseline['fps'] and result['fps'] < baseline['fps'] * (1 - tolerance):
+        slower.append('fps')
+    print(f"{'stage':<10}{'base p50':>10}{'now p50':>10}{'change':>9}")
+    for name, s in result['stages'].items():
+        base = baseline['stages'].get(name)
+        if base is None:
+            continue
+        change = (s['p50'] - base['p50']) / base['p50'] if base['p50'] else 0.0
+        flag = ""
+        if change > tolerance:
+            slower.append(name)
+            flag = "  SLOWER"
+        print(f"{name:<10}{base['p50']:10.2f}{s['p50']:10.2f}{change:+9.1%}{flag}")
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless painter pipeline benchmark")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--video', help="video file to replay")
+    source.add_argument('--synthetic', type=int, metavar='N', help="generate N synthetic frames")
+    source.add_argument('--replay', metavar='PATH', help="replay a landmark recording (no inference)")
+    parser.add_argument('--loops', type=int, default=1, help="times to play a --replay recording")
+    parser.add_argument('--record', metavar='PATH', help="save the detector's landmarks while running")
+    parser.add_argument('--frames', type=int, help="stop after this many frames")
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--infer-size', type=int, nargs=2, default=(512, 300), metavar=('W', 'H'))
+    parser.add_argument('--complexity', type=int, default=1, choices=(0, 1))
+    parser.add_argument('--save-baseline', metavar='PATH')
+    parser.add_argument('--compare', metavar='PATH')
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    recorder = LandmarkRecorder(args.record) if args.record else None
+    if args.replay:
+        detector = replayHandDetector(args.replay, loop=True)
+        count = args.frames or len(detector.frames) * args.loops
+        painter = HeadlessPainter(detector, recorder=recorder)
+        frames = blank_frames(count)
+    else:
+        detector = htm.handDetector(detectionCon=0.85, infer_size=tuple(args.infer_size),
+                                    modelComplexity=args.complexity)
+        if args.video:
+            frames = video_frames(args.video, args.frames)
+            painter = HeadlessPainter(detector, recorder=recorder)
+        else:
+            frames = synthetic_frames(args.frames or args.synthetic)
+            painter = HeadlessPainter(detector, scripted=ScriptedHand(1024, 600), recorder=recorder)
+
+    result = run(frames, painter, args.warmup)
+    if recorder is not None:
+        recorder.close()
+        print(f"Saved landmarks: {args.record} ({recorder.frames} frames)")
+    result['source'] = args.video or args.replay or f"synthetic:{args.synthetic}"
+    result['time'] = time.strftime("%Y-%m-%d %H:%M:%S")
+    report(result)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved baseline: {args.save_baseline}")
+    if args.compare:
+        with open(args.compare) as f:
+            slower = compare(result, json.load(f), args.tolerance)
+        if slower:
+            print("Slower than baseline: " + ", ".join(slower))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+# BufferPool.py
+import threading
+
+import numpy as np
+
+
+class FramePool:
+    """Reusable frame buffers shared by the capture, detection and compositing stages.
+
+    Each stage asks for a buffer by key (e.g. 'detect.rgb') and gets the same
+    array back every frame as long as the shape matches, so it can be passed
+    as dst= to OpenCV. Every real allocation is counted; call next_frame()
+    once per frame to read how many happened since the previous call (zero
+    in steady state).
+    """
+
+    def __init__(self):
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self.allocations = 0
+        self.frame_allocations = 0
+        self.last_frame_allocations = 0
+
+    def get(self, key, shape, dtype=np.uint8):
+        shape = tuple(shape)
+        with self._lock:
+            buf = self._buffers.get(key)
+            if buf is None or buf.shape != shape or buf.dtype != dtype:
+                buf = self._buffers[key] = np.empty(shape, dtype)
+                self.allocations += 1
+                self.frame_allocations += 1
+            return buf
+
+    def next_frame(self):
+        """Return the allocation count since the last call and start a new frame"""
+        with self._lock:
+            self.last_frame_allocations, self.frame_allocations = self.frame_allocations, 0
+        return self.last_frame_allocations
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(buf.nbytes for buf in self._buffers.values())
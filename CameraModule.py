@@ -0,0 +1,416 @@
+# CameraModule.py
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from BufferPool import FramePool
+
+
+class MirrorScaler:
+    """Mirror and scale a frame in a single cv2.remap pass.
+
+    The remap tables are built once per source size and reused, and the
+    result can be written into a caller-owned buffer (out=).
+    """
+
+    def __init__(self, width, height, mirror=True):
+        self.size = (width, height)
+        self.mirror = mirror
+        self._maps = {}   # (src_w, src_h) -> (map1, map2)
+
+    def _build(self, sw, sh):
+        w, h = self.size
+        # Pixel-center mapping, same as cv2.resize(INTER_LINEAR)
+        xs = (np.arange(w, dtype=np.float32) + 0.5) * (sw / float(w)) - 0.5
+        ys = (np.arange(h, dtype=np.float32) + 0.5) * (sh / float(h)) - 0.5
+        if self.mirror:
+            xs = (sw - 1) - xs
+        mapx = np.repeat(xs[None, :], h, axis=0)
+        mapy = np.repeat(ys[:, None], w, axis=1)
+        return cv2.convertMaps(mapx, mapy, cv2.CV_16SC2)
+
+    def apply(self, src, out=None):
+        sh, sw = src.shape[:2]
+        if (sw, sh) == self.size:
+            # Native size: a plain flip/copy beats a remap
+            if self.mirror:
+                return cv2.flip(src, 1, dst=out)
+            if out is None:
+                return src
+            np.copyto(out, src)
+            return out
+        maps = self._maps.get((sw, sh))
+        if maps is None:
+            maps = self._maps[(sw, sh)] = self._build(sw, sh)
+        return cv2.remap(src, maps[0], maps[1], cv2.INTER_LINEAR,
+                         dst=out, borderMode=cv2.BORDER_REPLICATE)
+
+
+# Resolutions worth probing; OpenCV can't list a camera's modes, but a
+# camera asked for an unsupported size snaps to one it does support.
+CANDIDATE_MODES = [(320, 240), (640, 360), (640, 480), (800, 600), (960, 540),
+                   (1024, 576), (1024, 600), (1024, 768), (1280, 720), (1280, 960),
+                   (1600, 900), (1920, 1080)]
+
+
+def fourcc_name(value):
+    value = int(value)
+    return ''.join(chr((value >> (8 * i)) & 0xFF) for i in range(4)).strip('\x00')
+
+
+def pick_mode(modes, width, height):
+    """Closest native mode to width x height.
+
+    Prefers the aspect ratio, then the smallest mode covering the request
+    (downscaling keeps detail), then the largest smaller one.
+    """
+    target = width / float(height)
+
+    def score(mode):
+        w, h = mode
+        aspect = abs(np.log((w / float(h)) / target))
+        covers = w >= width and h >= height
+        return (round(aspect, 2), not covers, w * h if covers else -w * h)
+
+    return min(modes, key=score)
+
+
+def negotiate_mode(cap, width, height, fps=30, fourccs=('MJPG', 'YUYV')):
+    """Find the camera's supported modes, pick the closest one and set it up.
+
+    Returns a dict describing the negotiated mode (size, fps, pixel format).
+    """
+    modes = set()
+    for w, h in CANDIDATE_MODES + [(width, height)]:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, w)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, h)
+        got = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        if got[0] > 0 and got[1] > 0:
+            modes.add(got)
+    mode = pick_mode(modes, width, height) if modes else (width, height)
+
+    # Compressed formats first: they reach full FPS over USB at larger sizes
+    for name in fourccs:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*name))
+        if fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)) == name:
+            break
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode[0])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode[1])
+    cap.set(cv2.CAP_PROP_FPS, fps)
+    return {
+        'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        'fps': cap.get(cv2.CAP_PROP_FPS),
+        'fourcc': fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)),
+        'supported': sorted(modes),
+    }
+
+
+def apply_mode(cap, mode):
+    """Set up a mode returned by negotiate_mode() again, without probing"""
+    if mode['fourcc']:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode['fourcc']))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode['width'])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode['height'])
+    cap.set(cv2.CAP_PROP_FPS, mode['fps'])
+
+
+class FrameGrabber:
+    """Capture frames off the UI thread and keep only the freshest one.
+
+    OpenCV cameras are read on a background thread. The Kivy Camera fallback
+    takes each frame from the provider's public ``on_texture`` event: the
+    Android provider's CPU-side NV21 preview buffer, or on other providers
+    the texture's pixels. A conversion thread mirrors, converts and scales
+    it into one of a few reused output buffers. Either way the newest frame
+    lands in a single slot; if it was not consumed before the next one
+    arrived, the old one is dropped.
+    """
+
+    def __init__(self, width=1024, height=600, src=0, mirror=True, prefer_kivy=None, pool=None,
+                 fps=30, negotiate=True):
+        self.width = width
+        self.height = height
+        self.src = src
+        self.mirror = mirror
+        self.fps = fps
+        self.negotiate = negotiate
+        self.mode = None            # negotiated camera mode (OpenCV path), probed once
+        if prefer_kivy is None:
+            # On Android the Kivy provider is the camera path that works
+            try:
+                from kivy.utils import platform
+                prefer_kivy = platform == 'android'
+            except ImportError:
+                prefer_kivy = False
+        self.prefer_kivy = prefer_kivy
+
+        # Output frames come from a ring of pooled buffers (one being read,
+        # one waiting in the slot, one being written)
+        self.pool = pool if pool is not None else FramePool()
+        self.cap = None
+        self.camera_widget = None
+        self.use_kivy_camera = False
+        self.kivy_source = None     # 'cpu' (Android preview buffer) or 'gpu' (texture readback)
+
+        self._lock = threading.Lock()
+        self._slot = None          # (frame, timestamp, frame_id) or None
+        self._thread = None         # kept until the thread has really finished
+        self._stop = None           # stop Event of the current capture/convert thread
+        self._running = False
+
+        self._ring_size = 3
+        self._ring_slot = -1
+        self._ring_read = -1
+        self._raw_shape = None      # shape of the camera's own frames (OpenCV path)
+
+        # Kivy path: raw provider frame waiting for conversion
+        self._raw_cond = threading.Condition()
+        self._raw = None
+        # Called (on the capture thread) after every published frame
+        self.on_frame = None
+        # Mirror + scale in one pass, for both camera paths
+        self._scaler = MirrorScaler(width, height, mirror)
+
+        # Counters
+        self.frame_id = 0
+        self.frames_captured = 0
+        self.frames_delivered = 0
+        self.frames_dropped = 0     # published frames replaced before read() (under _lock)
+        self.frames_replaced = 0    # provider frames replaced before conversion (under _raw_cond)
+        self.last_frame_time = 0.0
+        self.last_frame_age = 0.0
+        self.preprocess_time = 0.0  # seconds spent turning the last camera frame into output
+
+    # --------- Setup ----------
+    def start(self):
+        """Open a camera (OpenCV first, Kivy Camera as fallback)."""
+        if self._thread is not None:
+            # A thread that outlived stop() must be gone before a new one
+            # starts publishing into the same ring
+            self._thread.join()
+            self._thread = None
+        if not self.prefer_kivy and self._start_opencv():
+            return True
+        if self._start_kivy():
+            return True
+        return self.prefer_kivy and self._start_opencv()
+
+    def _start_opencv(self):
+        try:
+            cap = cv2.VideoCapture(self.src)
+            if not cap or not cap.isOpened():
+                raise RuntimeError("cv2 camera not available")
+            self.cap = cap
+            self.use_kivy_camera = False
+            self._running = True
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._capture_loop, args=(cap, self._stop),
+                                            daemon=True)
+            self._thread.start()
+            print("Using OpenCV VideoCapture")
+            return True
+        except Exception as e:
+            print(f"OpenCV camera failed: {e}")
+        return False
+
+    def _start_kivy(self):
+        try:
+            from kivy.uix.camera import Camera
+            self.camera_widget = Camera(play=True, resolution=(self.width, self.height))
+            # Not displayed directly (we composite into our own Image), but
+            # it must stay in the widget tree so Kivy keeps filling it.
+            self.camera_widget.opacity = 0
+            self._hook_provider(self.camera_widget._camera)
+            self.use_kivy_camera = True
+            self._running = True
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._convert_loop, args=(self._stop,), daemon=True)
+            self._thread.start()
+            print(f"Using Kivy Camera fallback ({self.kivy_source} frames)")
+            return True
+        except Exception as e:
+            print(f"Kivy Camera fallback failed: {e}")
+        return False
+
+    def _hook_provider(self, camera):
+        """Take frames from the provider's on_texture event"""
+        if hasattr(camera, 'grab_frame'):
+            # Android provider keeps the NV21 preview buffer for us
+            self.kivy_source = 'cpu'
+            camera.bind(on_texture=self._on_android_frame)
+        else:
+            self.kivy_source = 'gpu'
+            camera.bind(on_texture=self._on_kivy_texture)
+
+    def stop(self):
+        """Stop capturing; the capture thread releases its camera on the way out."""
+        self._running = False
+        if self._stop is not None:
+            self._stop.set()
+        with self._raw_cond:
+            self._raw_cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            if not self._thread.is_alive():
+                self._thread = None
+        self.cap = None
+        if self.camera_widget is not None:
+            self.camera_widget.play = False
+
+    # --------- Producers ----------
+    def _capture_loop(self, cap, stop):
+        # Each thread owns its capture and stop event, so a thread that is
+        # still winding down never touches the next start()'s camera
+        try:
+            # Probing modes can take a while (and each size change may restart
+            # the stream), so it happens here rather than in start(), and only
+            # on the first start; later starts reuse the mode it found
+            if self.negotiate and self.mode is not None:
+                apply_mode(cap, self.mode)
+            elif self.negotiate:
+                self.mode = negotiate_mode(cap, self.width, self.height, self.fps)
+                print("Camera mode: {width}x{height} @ {fps:.0f} fps, {fourcc}".format(**self.mode))
+            else:
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            while not stop.is_set():
+                raw = self.pool.get('grab.raw', self._raw_shape) if self._raw_shape else None
+                ok, img = cap.read(raw)
+                if not ok:
+                    time.sleep(0.005)
+                    continue
+                if img is not raw:
+                    # First frame (or the camera changed size): read into a pooled buffer from now on
+                    self._raw_shape = img.shape
+                idx = self._free_ring_index()
+                start = time.perf_counter()
+                out = self._scaler.apply(img, self._ring_buffer(idx))
+                self.preprocess_time = time.perf_counter() - start
+                if stop.is_set():
+                    break
+                self._publish(out, idx)
+        finally:
+            cap.release()
+
+    def _on_android_frame(self, camera):
+        if not self._running:
+            return
+        buf = camera.grab_frame()
+        if buf is not None:
+            w, h = camera.resolution
+            self._offer('nv21', buf, w, h)
+
+    def _on_kivy_texture(self, camera):
+        # Read the texture back from the GPU (main thread only)
+        if not self._running:
+            return
+        tex = camera.texture
+        if tex is None:
+            return
+        w, h = tex.size
+        self._offer('rgba', tex.pixels, w, h)
+
+    def _offer(self, fmt, buf, w, h):
+        """Queue a raw provider frame for the conversion thread (newest wins)"""
+        with self._raw_cond:
+            if self._raw is not None:
+                self.frames_replaced += 1
+            self._raw = (fmt, buf, w, h)
+            self._raw_cond.notify()
+
+    def _convert_loop(self, stop):
+        while True:
+            with self._raw_cond:
+                while not stop.is_set() and self._raw is None:
+                    self._raw_cond.wait()
+                if stop.is_set():
+                    return
+                raw, self._raw = self._raw, None
+            idx = self._free_ring_index()
+            out = self._ring_buffer(idx)
+            start = time.perf_counter()
+            self._convert(raw, out)
+            self.preprocess_time = time.perf_counter() - start
+            self._publish(out, idx)
+
+    def _convert(self, raw, out):
+        """Color-convert, mirror and scale a provider frame into out"""
+        fmt, buf, w, h = raw
+        arr = np.frombuffer(buf, np.uint8)
+        if fmt == 'nv21':
+            # YUV must be converted at full size before it can be resampled
+            bgr = cv2.cvtColor(arr.reshape(h * 3 // 2, w), cv2.COLOR_YUV2BGR_NV21,
+                               dst=self.pool.get('grab.convert', (h, w, 3)))
+            self._scaler.apply(bgr, out)
+            return
+        channels = arr.size // (w * h)
+        src = arr.reshape(h, w, channels)
+        if fmt == 'bgr':
+            self._scaler.apply(src, out)
+            return
+        # rgb/rgba: resample at source depth first (fewer pixels when
+        # downscaling), then swap channels straight into out
+        scaled = self._scaler.apply(src, self.pool.get('grab.convert', (self.height, self.width, channels)))
+        code = cv2.COLOR_RGBA2BGR if channels == 4 else cv2.COLOR_RGB2BGR
+        cv2.cvtColor(scaled, code, dst=out)
+
+    def _ring_buffer(self, idx):
+        return self.pool.get(('grab.out', idx), (self.height, self.width, 3))
+
+    def _free_ring_index(self):
+        with self._lock:
+            busy = (self._ring_slot, self._ring_read)
+        for i in range(self._ring_size):
+            if i not in busy:
+                return i
+
+    def _publish(self, frame, ring_index=-1):
+        now = time.time()
+        with self._lock:
+            if self._slot is not None:
+                self.frames_dropped += 1
+            self.frame_id += 1
+            self.frames_captured += 1
+            self._slot = (frame, now, self.frame_id)
+            self._ring_slot = ring_index
+        if self.on_frame is not None:
+            self.on_frame()
+
+    # --------- Consumer ----------
+    def read(self):
+        """Return the newest unread frame (BGR) or None; never blocks on the camera.
+
+        Frames live in reused buffers: a frame stays valid until the next
+        read() that returns a new one.
+        """
+        with self._lock:
+            slot, self._slot = self._slot, None
+            if slot is not None:
+                self._ring_read, self._ring_slot = self._ring_slot, -1
+        if slot is None:
+            return None
+        frame, ts, _ = slot
+        self.frames_delivered += 1
+        self.last_frame_time = ts
+        self.last_frame_age = time.time() - ts
+        return frame
+
+    def frame_age(self):
+        """Seconds since the most recently delivered frame was captured."""
+        if not self.last_frame_time:
+            return 0.0
+        return time.time() - self.last_frame_time
+
+    def stats(self):
+        return {
+            'captured': self.frames_captured,
+            'delivered': self.frames_delivered,
+            'dropped': self.frames_dropped,
+            'replaced': self.frames_replaced,
+            'frame_age': self.last_frame_age,
+            'preprocess_ms': self.preprocess_time * 1000.0,
+            'mode': self.mode,
+        }
@@ -0,0 +1,118 @@
+# Compositor.py
+import cv2
+import numpy as np
+
+
+class OverlayCompositor:
+    """Composite the drawing canvas over camera frames, touching only drawn areas.
+
+    Same result as the old full-frame gray/threshold/bitwise chain: where
+    the canvas is brighter than `threshold` (in gray) it replaces the frame,
+    elsewhere it is OR-ed onto it. The threshold mask is kept between frames
+    and refreshed only inside the regions the canvas reports as dirty, and
+    compositing is limited to the bounding box of the canvas content.
+    """
+
+    def __init__(self, threshold=50, pool=None):
+        self.threshold = threshold
+        self.pool = pool
+        self.mask = None        # uint8, 255 where the canvas replaces the frame
+        self.content = None     # (x0, y0, x1, y1) of non-empty canvas, or None
+
+    def update(self, canvas, dirty):
+        """Refresh the mask and content box for a changed region of the canvas"""
+        h, w = canvas.shape[:2]
+        if self.mask is None or self.mask.shape != (h, w):
+            self.mask = np.zeros((h, w), np.uint8)
+            dirty = (0, 0, w, h)
+        if dirty is None:
+            return
+        x0, y0, x1, y1 = dirty
+        if x0 >= x1 or y0 >= y1:
+            return
+        region = canvas[y0:y1, x0:x1]
+        gray = None
+        if self.pool is not None:
+            gray = self.pool.get('composite.gray', (h, w))[y0:y1, x0:x1]
+        gray = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY, dst=gray)
+        cv2.threshold(gray, self.threshold, 255, cv2.THRESH_BINARY, dst=self.mask[y0:y1, x0:x1])
+
+        if (x1 - x0, y1 - y0) == (w, h):
+            # Clear/resize: the only time the box is recomputed (and can shrink)
+            self.content = self._bounds(canvas)
+        elif region.any():
+            if self.content is None:
+                self.content = dirty
+            else:
+                cx0, cy0, cx1, cy1 = self.content
+                self.content = (min(cx0, x0), min(cy0, y0), max(cx1, x1), max(cy1, y1))
+
+    @staticmethod
+    def _bounds(canvas):
+        rows = np.flatnonzero(canvas.any(axis=(1, 2)))
+        if not len(rows):
+            return None
+        cols = np.flatnonzero(canvas[rows[0]:rows[-1] + 1].any(axis=(0, 2)))
+        return (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+
+    def composite(self, img, canvas):
+        """Draw canvas onto img in place and return img"""
+        if self.content is None:
+            return img
+        x0, y0, x1, y1 = self.content
+        out = img[y0:y1, x0:x1]
+        cv2.bitwise_or(out, canvas[y0:y1, x0:x1], dst=out)
+        cv2.copyTo(canvas[y0:y1, x0:x1], self.mask[y0:y1, x0:x1], out)
+        return img
+
+
+class GuideBlender:
+    """Blend a guide image into frames, only where the guide has content.
+
+    The guide's share (guide * alpha, rounded to uint8) and a content mask
+    are computed once per guide, along with the bounding box of the content
+    in each horizontal band of rows. Each frame then blends only inside
+    those boxes and copies the result back through the mask, so background
+    (near-black) guide pixels leave the frame untouched instead of
+    darkening it.
+    """
+
+    def __init__(self, alpha=0.3, threshold=8, band=16):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.band = band
+        self._guide = None
+        self._share = None      # uint8 guide * alpha
+        self._mask = None       # uint8, 255 where the guide has content
+        self._rects = []        # (x0, y0, x1, y1) content box per band of rows
+        self._tmp = None
+
+    def prepare(self, guide):
+        """Precompute the blend for a new guide (done automatically by apply())"""
+        self._guide = guide
+        self._share = cv2.convertScaleAbs(guide, alpha=self.alpha)
+        gray = guide.max(axis=2)
+        self._mask = np.where(gray > self.threshold, 255, 0).astype(np.uint8)
+        self._rects = []
+        for y0 in range(0, guide.shape[0], self.band):
+            y1 = min(y0 + self.band, guide.shape[0])
+            cols = np.flatnonzero(self._mask[y0:y1].any(axis=0))
+            if len(cols):
+                self._rects.append((int(cols[0]), y0, int(cols[-1]) + 1, y1))
+        if self._tmp is None or self._tmp.shape != guide.shape:
+            self._tmp = np.empty_like(guide)
+
+    def apply(self, img, guide):
+        """Blend guide into img in place and return img"""
+        if guide.shape != img.shape:
+            return img
+        if guide is not self._guide:
+            self.prepare(guide)
+        keep = 1.0 - self.alpha
+        for x0, y0, x1, y1 in self._rects:
+            out = img[y0:y1, x0:x1]
+            tmp = self._tmp[y0:y1, x0:x1]
+            # img * (1 - alpha) + precomputed guide share
+            cv2.scaleAdd(out, keep, self._share[y0:y1, x0:x1], dst=tmp)
+            cv2.copyTo(tmp, self._mask[y0:y1, x0:x1], out)
+        return img
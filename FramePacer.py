@@ -0,0 +1,93 @@
+# FramePacer.py
+import threading
+import time
+
+
+class FramePacer:
+    """Run a UI update only when there is something new, at most target_fps times a second.
+
+    Producers (camera grabber, hand detector) call notify() from their own
+    threads. A notification that arrives while an update is already
+    scheduled is merged into it, so a slow UI thread never builds a backlog:
+    the next update simply picks up the newest data (back-pressure). While
+    paused, notifications are ignored and nothing is scheduled, so a screen
+    that isn't visible costs no UI time.
+
+    `clock` needs schedule_once(fn, delay) and unschedule(fn); it defaults
+    to Kivy's Clock, imported on first use so the pacing logic also runs
+    without Kivy.
+    """
+
+    def __init__(self, callback, target_fps=30, clock=None):
+        self.callback = callback
+        self.target_fps = target_fps
+        self._clock = clock
+        self.active = False
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._last = 0.0
+
+        # Counters
+        self.notifications = 0
+        self.merged = 0             # notifications folded into an already scheduled update
+        self.updates = 0
+        self.update_time = 0.0      # seconds the last callback took
+
+    @property
+    def clock(self):
+        if self._clock is None:
+            from kivy.clock import Clock
+            self._clock = Clock
+        return self._clock
+
+    @property
+    def interval(self):
+        return 1.0 / self.target_fps if self.target_fps else 0.0
+
+    def notify(self, *_):
+        """Something new is available; safe to call from any thread"""
+        with self._lock:
+            self.notifications += 1
+            if not self.active:
+                return
+            if self._scheduled:
+                self.merged += 1
+                return
+            self._scheduled = True
+            # Respect the target rate: never run sooner than one interval
+            # after the previous update started
+            delay = max(0.0, self._last + self.interval - time.perf_counter())
+        self.clock.schedule_once(self._tick, delay)
+
+    def resume(self):
+        with self._lock:
+            self.active = True
+            self._last = 0.0
+        # Pick up anything that arrived while paused
+        self.notify()
+
+    def pause(self):
+        with self._lock:
+            self.active = False
+            self._scheduled = False
+        self.clock.unschedule(self._tick)
+
+    def stats(self):
+        return {
+            'notifications': self.notifications,
+            'merged': self.merged,
+            'updates': self.updates,
+            'update_ms': self.update_time * 1000.0,
+        }
+
+    def _tick(self, _dt):
+        with self._lock:
+            self._scheduled = False
+            if not self.active:
+                return
+            now = time.perf_counter()
+            dt = now - self._last if self._last else self.interval
+            self._last = now
+        self.updates += 1
+        self.callback(dt)
+        self.update_time = time.perf_counter() - now
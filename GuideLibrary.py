@@ -0,0 +1,146 @@
+# GuideLibrary.py
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+class GuideLibrary:
+    """Guide images, decoded on demand on a background thread.
+
+    Nothing is read until scan() (just a directory listing). get() never
+    blocks: it returns the decoded, resized image if it is in the LRU and
+    otherwise queues it for the loader and returns None. Resized images are
+    saved as .npy files in cache_dir, so later launches load them without
+    decoding or resizing; a cache entry is keyed on the source file's size
+    and mtime, so replacing a guide invalidates it.
+    """
+
+    def __init__(self, folder, size=(1024, 600), capacity=3, cache_dir=None):
+        self.folder = folder
+        self.size = size
+        self.capacity = capacity
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "VirtualPainter", "guides")
+        self.cache_dir = cache_dir
+        self.files = None           # None until scan()
+        self._images = OrderedDict()  # index -> image, most recently used last
+        self._cond = threading.Condition()
+        self._queue = []            # indices waiting to load, most urgent last
+        self._failed = set()        # indices that couldn't be read; not retried
+        self._thread = None
+        self.on_loaded = None       # called (on the loader thread) after an image is loaded
+
+        # Counters
+        self.decoded = 0
+        self.cache_hits = 0
+
+    @property
+    def scanned(self):
+        return self.files is not None
+
+    def __len__(self):
+        return len(self.files) if self.files else 0
+
+    def scan(self):
+        """List the guide files; returns how many there are"""
+        files = []
+        if os.path.isdir(self.folder):
+            try:
+                files = sorted(f for f in os.listdir(self.folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+            except OSError as e:
+                print(f"Error loading guides: {e}")
+        self.files = files
+        return len(files)
+
+    # --------- Access ----------
+    def get(self, index):
+        """The image for index, or None while it is still loading"""
+        with self._cond:
+            img = self._images.get(index)
+            if img is not None:
+                self._images.move_to_end(index)
+                return img
+        self.request(index)
+        return None
+
+    def prefetch(self, index):
+        """Start loading index in the background if it isn't loaded yet"""
+        if len(self):
+            self.request(index % len(self), urgent=False)
+
+    def request(self, index, urgent=True):
+        with self._cond:
+            if index in self._images or index in self._failed:
+                return
+            if index in self._queue:
+                self._queue.remove(index)
+            if urgent:
+                self._queue.append(index)
+            else:
+                self._queue.insert(0, index)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loader, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    # --------- Loading ----------
+    def _loader(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                index = self._queue.pop()
+                if index in self._images:
+                    continue
+            img = self._load(index)
+            with self._cond:
+                if img is None:
+                    self._failed.add(index)
+                    continue
+                self._images[index] = img
+                self._images.move_to_end(index)
+                while len(self._images) > self.capacity:
+                    self._images.popitem(last=False)
+            if self.on_loaded is not None:
+                self.on_loaded()
+
+    def _cache_path(self, path):
+        st = os.stat(path)
+        name = os.path.splitext(os.path.basename(path))[0]
+        w, h = self.size
+        return os.path.join(self.cache_dir, f"{name}_{w}x{h}_{st.st_size}_{int(st.st_mtime)}.npy")
+
+    def _load(self, index):
+        if not self.files or not 0 <= index < len(self.files):
+            return None
+        path = os.path.join(self.folder, self.files[index])
+        try:
+            cache = self._cache_path(path)
+            if os.path.exists(cache):
+                img = np.load(cache)
+                if img.shape[:2] == (self.size[1], self.size[0]):
+                    self.cache_hits += 1
+                    return img
+            img = cv2.imread(path)
+            if img is None:
+                return None
+            img = cv2.resize(img, self.size)
+            self.decoded += 1
+        except Exception as e:
+            print(f"Error loading guide {path}: {e}")
+            return None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename, so a crash never leaves a half-written cache file
+            tmp = cache + ".tmp"
+            with open(tmp, 'wb') as f:
+                np.save(f, img)
+            os.replace(tmp, cache)
+        except OSError as e:
+            print(f"Could not cache guide {path}: {e}")
+        return img
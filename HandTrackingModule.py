@@ -1,51 +1,132 @@
 # HandTrackingModule.py
 import cv2
 import mediapipe as mp
+import numpy as np
+import threading
 import time
 
 
 class handDetector:
-    def __init__(self, mode=False, maxHands=2, detectionCon=0.3, trackCon=0.3):
+    def __init__(self, mode=False, maxHands=2, detectionCon=0.3, trackCon=0.3, infer_size=None,
+                 modelComplexity=1, scheduler=None, extrapolate=False, landmarkFilter=None,
+                 pool=None):
         self.results = None
+        self.result_time = 0.0   # when the frame behind self.results was taken
         self.mode = mode
         self.maxHands = maxHands
         self.detectionCon = detectionCon
         self.trackCon = trackCon
+        # (width, height) fed to MediaPipe; None keeps the frame size.
+        # Landmarks are normalized, so findPosition still maps them onto the
+        # full-size frame it is given.
+        self.infer_size = infer_size
+        # Optional BufferPool.FramePool for the resize/RGB buffers
+        self.pool = pool
+        self.modelComplexity = modelComplexity
+        # Optional AdaptiveScheduler deciding which frames get inference
+        self.scheduler = scheduler
+        # Move tracked landmarks along their velocity between results
+        self.extrapolate = extrapolate
+        self.maxExtrapolation = 0.15  # seconds
+        # Optional factory (e.g. OneEuroFilter) giving each tracked hand its
+        # own smoothing/prediction filter
+        self.landmarkFilter = landmarkFilter
 
         # Initialize MediaPipe components
         self.mpHands = mp.solutions.hands
-        self.hands = self.mpHands.Hands(
+        self.hands = self._createHands()
+
+        self.mpDraw = mp.solutions.drawing_utils
+        self.mpDrawStyles = mp.solutions.drawing_styles
+        self.tipIds = [4, 8, 12, 16, 20]
+        self.lmList = []
+
+        # Preallocated buffers for findPositionArray: rows are [id, x, y]
+        self._tips = np.array(self.tipIds[1:])
+        self._lmNorm = np.zeros((21, 2), np.float64)
+        self.lmArray = np.zeros((21, 3), np.int32)
+        self.lmArray[:, 0] = np.arange(21)
+
+        # Multi-hand tracking (findAllHands)
+        self.maxMatchDist = 0.2   # max wrist travel (normalized) to keep a hand's id
+        self.maxMissed = 5        # results a hand may be missing before its id is dropped
+        self.hands_list = []
+        self.activeIds = set()
+        self._tracks = {}         # id -> {'type', 'norm', 'vel', 'time', 'missed', 'filter'}
+        self._nextId = 0
+        self._trackedResults = None
+        self._matched = []
+        self._handArrays = np.zeros((self.maxHands, 21, 3), np.int32)
+        self._handArrays[:, :, 0] = np.arange(21)
+
+    def _createHands(self):
+        return self.mpHands.Hands(
             static_image_mode=self.mode,
             max_num_hands=self.maxHands,
             min_detection_confidence=self.detectionCon,
             min_tracking_confidence=self.trackCon,
-            model_complexity=1
+            model_complexity=self.modelComplexity
         )
 
-        self.mpDraw = mp.solutions.drawing_utils
-        self.mpDrawStyles = mp.solutions.drawing_styles
-        self.tipIds = [4, 8, 12, 16, 20]
-        self.lmList = []
+    def setModelComplexity(self, complexity):
+        """Switch the MediaPipe model (0 = lite, 1 = full)"""
+        if complexity == self.modelComplexity:
+            return
+        self.modelComplexity = complexity
+        old, self.hands = self.hands, self._createHands()
+        old.close()
 
-    def findHands(self, img, draw=True):
-        """Detect hands and draw landmarks on the image"""
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.hands.process(imgRGB)
+    def _scheduleInference(self):
+        """Ask the scheduler (if any) whether this frame should be inferred"""
+        if self.scheduler is None:
+            return True
+        infer = self.scheduler.should_infer()
+        if self.scheduler.model_complexity != self.modelComplexity:
+            self.setModelComplexity(self.scheduler.model_complexity)
+        return infer
 
-        if self.results.multi_hand_landmarks:
-            for handLms in self.results.multi_hand_landmarks:
-                if draw:
-                    self.mpDraw.draw_landmarks(
-                        img,
-                        handLms,
-                        self.mpHands.HAND_CONNECTIONS,
-                        self.mpDrawStyles.get_default_hand_landmarks_style(),
-                        self.mpDrawStyles.get_default_hand_connections_style()
-                    )
+    def findHands(self, img, draw=True, timestamp=None):
+        """Detect hands and draw landmarks on the image.
+
+        timestamp is when img was captured (time.time() clock); defaults to now.
+        """
+        if self._scheduleInference():
+            start = time.time()
+            self.results = self.hands.process(self._prepare(img))
+            self.result_time = timestamp or start
+            if self.scheduler is not None:
+                self.scheduler.update_latency(time.time() - start)
+        if draw:
+            self._drawHands(img)
         return img
 
+    def _prepare(self, img, key='detect.rgb'):
+        """Downscale (if configured) and convert a BGR frame to MediaPipe's RGB input"""
+        if self.infer_size and (img.shape[1], img.shape[0]) != tuple(self.infer_size):
+            w, h = self.infer_size
+            img = cv2.resize(img, (w, h), dst=self._buffer('detect.small', (h, w, 3)),
+                             interpolation=cv2.INTER_LINEAR)
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=self._buffer(key, img.shape))
+
+    def _buffer(self, key, shape):
+        """Pooled dst buffer, or None (let OpenCV allocate) without a pool"""
+        if self.pool is None:
+            return None
+        return self.pool.get(key, shape)
+
+    def _drawHands(self, img):
+        if self.results and self.results.multi_hand_landmarks:
+            for handLms in self.results.multi_hand_landmarks:
+                self.mpDraw.draw_landmarks(
+                    img,
+                    handLms,
+                    self.mpHands.HAND_CONNECTIONS,
+                    self.mpDrawStyles.get_default_hand_landmarks_style(),
+                    self.mpDrawStyles.get_default_hand_connections_style()
+                )
+
     def findPosition(self, img, handNo=0, draw=True):
-        """Return list of landmark positions (id, x, y)"""
+        """Return list of landmark positions (id, x, y) in img's pixel space"""
         self.lmList = []
         if self.results and self.results.multi_hand_landmarks:
             try:
@@ -60,8 +141,149 @@ class handDetector:
                 pass  # if hand not detected properly
         return self.lmList
 
-    def fingersUp(self):
-        """Check which fingers are up"""
+    def findPositionArray(self, img, handNo=0, draw=False):
+        """Vectorized findPosition: a (21, 3) int32 array of [id, x, y], or None.
+
+        The array is reused between calls; copy it if you need to keep it.
+        """
+        if not (self.results and self.results.multi_hand_landmarks):
+            return None
+        try:
+            myHand = self.results.multi_hand_landmarks[handNo]
+        except IndexError:
+            return None
+        self._lmNorm[:] = [(lm.x, lm.y) for lm in myHand.landmark]
+        self._fillArray(self._lmNorm, img.shape, self.lmArray)
+        if draw:
+            self._drawPoints(img, self.lmArray)
+        return self.lmArray
+
+    def _fillArray(self, norm, shape, out):
+        """Scale (21, 2) normalized coords into out's x/y columns"""
+        h, w = shape[:2]
+        np.multiply(norm, (w, h), out=self._lmNorm)
+        # Truncating cast, same as int(lm.x * w)
+        out[:, 1:] = self._lmNorm
+
+    def _drawPoints(self, img, lmArray):
+        for _, cx, cy in lmArray.tolist():
+            cv2.circle(img, (cx, cy), 5, (255, 0, 255), 2)
+
+    def findAllHands(self, img, draw=False):
+        """Return every detected hand in one pass.
+
+        Each hand is a dict with 'id' (stable while the hand stays in view),
+        'type' ('Left'/'Right'), 'score', 'lm' (a (21, 3) [id, x, y] array,
+        reused between calls) and 'fingers'.
+        """
+        if self.results is not self._trackedResults:
+            self._trackedResults = self.results
+            self._updateTracks()
+        hands = []
+        dt = 0.0
+        if self.extrapolate:
+            dt = min(time.time() - self.result_time, self.maxExtrapolation)
+        for i, (hid, handType, score) in enumerate(self._matched):
+            track = self._tracks[hid]
+            lm = self._handArrays[i]
+            if track['filter'] is not None:
+                norm = track['filter'].predict(dt)
+            elif dt:
+                norm = track['norm'] + track['vel'] * dt
+            else:
+                norm = track['norm']
+            self._fillArray(norm, img.shape, lm)
+            if draw:
+                self._drawPoints(img, lm)
+            hands.append({
+                'id': hid,
+                'type': handType,
+                'score': score,
+                'lm': lm,
+                'fingers': self.fingersUp(lm, handType),
+            })
+        self.hands_list = hands
+        return hands
+
+    def _updateTracks(self):
+        """Match the current results to known hands by wrist distance"""
+        self._matched = []
+        detections = []
+        if self.results and self.results.multi_hand_landmarks:
+            handedness = self.results.multi_handedness or []
+            for i, handLms in enumerate(self.results.multi_hand_landmarks[:self.maxHands]):
+                label, score = 'Right', 0.0
+                if i < len(handedness):
+                    cls = handedness[i].classification[0]
+                    label, score = cls.label, cls.score
+                norm = np.array([(lm.x, lm.y) for lm in handLms.landmark])
+                detections.append((norm, label, score))
+
+        # Greedy nearest wrist match; a hand that flips handedness costs extra
+        pairs = []
+        for di, (norm, label, _) in enumerate(detections):
+            for tid, track in self._tracks.items():
+                dist = float(np.linalg.norm(norm[0] - track['norm'][0]))
+                if track['type'] != label:
+                    dist += self.maxMatchDist
+                pairs.append((dist, di, tid))
+        pairs.sort()
+        assigned, used = {}, set()
+        for dist, di, tid in pairs:
+            if dist > self.maxMatchDist or di in assigned or tid in used:
+                continue
+            assigned[di] = tid
+            used.add(tid)
+
+        maxSpeed = 0.0
+        for di, (norm, label, score) in enumerate(detections):
+            tid = assigned.get(di)
+            vel = np.zeros_like(norm)
+            filt = None
+            if tid is None:
+                tid = self._nextId
+                self._nextId += 1
+            else:
+                prev = self._tracks[tid]
+                elapsed = self.result_time - prev['time']
+                if elapsed > 0 and not prev['missed']:
+                    vel = (norm - prev['norm']) / elapsed
+                    filt = prev['filter']
+            if self.landmarkFilter is not None:
+                # A hand that dropped out starts over with a fresh filter
+                if filt is None:
+                    filt = self.landmarkFilter()
+                norm = filt.filter(norm, self.result_time)
+                vel = filt.velocity
+            maxSpeed = max(maxSpeed, float(np.linalg.norm(vel[0])))
+            self._tracks[tid] = {'type': label, 'norm': norm, 'vel': vel,
+                                 'time': self.result_time, 'missed': 0, 'filter': filt}
+            used.add(tid)
+            self._matched.append((tid, label, score))
+        if self.scheduler is not None:
+            self.scheduler.update_motion(maxSpeed)
+
+        for tid in list(self._tracks):
+            if tid not in used:
+                self._tracks[tid]['missed'] += 1
+                if self._tracks[tid]['missed'] > self.maxMissed:
+                    del self._tracks[tid]
+        self.activeIds = set(self._tracks)
+
+    def fingersUp(self, lmArray=None, handType=None):
+        """Check which fingers are up (from lmList, or a findPositionArray result).
+
+        Pass handType ('Left'/'Right', as reported for a mirrored frame) to
+        use the correct thumb direction for that hand.
+        """
+        if lmArray is not None:
+            # Thumb compares x of tip vs joint, other fingers y of tip vs pip
+            if handType == 'Right':
+                thumb = int(lmArray[4, 1] < lmArray[3, 1])
+            else:
+                thumb = int(lmArray[4, 1] > lmArray[3, 1])
+            return [thumb] + (lmArray[self._tips, 2] < lmArray[self._tips - 2, 2]).astype(int).tolist()
+
         fingers = []
         if not self.lmList:
             return [0, 0, 0, 0, 0]
@@ -82,6 +304,308 @@ class handDetector:
         return fingers
 
 
+class OneEuroFilter:
+    """One Euro filter over a (21, 2) array of normalized landmarks.
+
+    Smooths hard when a landmark is slow (minCutoff, in Hz) and lets it
+    through faster as it speeds up (beta). predict() extrapolates along the
+    filtered velocity, plus `lead` seconds to hide pipeline latency.
+    """
+
+    def __init__(self, minCutoff=1.0, beta=5.0, dCutoff=1.0, lead=0.0):
+        self.minCutoff = minCutoff
+        self.beta = beta
+        self.dCutoff = dCutoff
+        self.lead = lead
+        self.x = None
+        self.raw = None
+        self.velocity = None
+        self.t = 0.0
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * np.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def filter(self, x, t):
+        if self.x is None:
+            self.x = np.array(x, np.float64)
+            self.raw = self.x.copy()
+            self.velocity = np.zeros_like(self.x)
+            self.t = t
+            return self.x
+        dt = t - self.t
+        if dt <= 0:
+            return self.x
+        self.t = t
+        # Velocity from raw samples, so smoothing lag doesn't inflate it
+        rawVel = (x - self.raw) / dt
+        self.raw[:] = x
+        self.velocity += self._alpha(self.dCutoff, dt) * (rawVel - self.velocity)
+        # One cutoff per landmark, driven by its speed
+        speed = np.linalg.norm(self.velocity, axis=1, keepdims=True)
+        alpha = self._alpha(self.minCutoff + self.beta * speed, dt)
+        self.x += alpha * (x - self.x)
+        return self.x
+
+    def predict(self, dt=0.0):
+        """Filtered position dt (+ lead) seconds after the last measurement"""
+        if self.x is None:
+            return None
+        return self.x + self.velocity * (dt + self.lead)
+
+
+class KalmanFilter:
+    """Constant-velocity Kalman filter over a (21, 2) array of landmarks.
+
+    Every coordinate uses the same motion model and noise, so one 2x2
+    covariance is shared by all of them. processNoise is the expected
+    acceleration variance, measurementNoise the landmark jitter variance
+    (both in normalized units).
+    """
+
+    def __init__(self, processNoise=50.0, measurementNoise=1e-5, lead=0.0):
+        self.q = processNoise
+        self.r = measurementNoise
+        self.lead = lead
+        self.x = None
+        self.velocity = None
+        self.P = None
+        self.t = 0.0
+
+    def filter(self, x, t):
+        if self.x is None:
+            self.x = np.array(x, np.float64)
+            self.velocity = np.zeros_like(self.x)
+            self.P = np.diag([self.r, 1.0])
+            self.t = t
+            return self.x
+        dt = t - self.t
+        if dt <= 0:
+            return self.x
+        self.t = t
+        # Predict
+        F = np.array([[1.0, dt], [0.0, 1.0]])
+        Q = self.q * np.array([[dt ** 4 / 4, dt ** 3 / 2], [dt ** 3 / 2, dt ** 2]])
+        self.x += self.velocity * dt
+        P = F @ self.P @ F.T + Q
+        # Update (position is measured)
+        k = P[:, 0] / (P[0, 0] + self.r)
+        innovation = x - self.x
+        self.x += k[0] * innovation
+        self.velocity += k[1] * innovation
+        self.P = P - np.outer(k, P[0])
+        return self.x
+
+    def predict(self, dt=0.0):
+        """Filtered position dt (+ lead) seconds after the last measurement"""
+        if self.x is None:
+            return None
+        return self.x + self.velocity * (dt + self.lead)
+
+
+class AdaptiveScheduler:
+    """Trade inference quality/rate for frame rate based on inference time.
+
+    The detector reports how long each hands.process() call took (on the
+    async worker that is the real bottleneck, not the UI frame time). When
+    that stays above the per-frame budget the scheduler steps down a level
+    (lite model, then inferring only every 2nd/3rd frame); when it is
+    comfortably within budget it steps back up. Stepping back up to a
+    different model is judged by that model's own last measured time (the
+    lite model's time says nothing about the full one), which is retried
+    only after `retry` results. should_infer() is called once per frame. Frames are only skipped while the hands move slowly
+    (see update_motion), so the skipped frames can be covered by
+    extrapolating the last landmarks.
+    """
+
+    # (model_complexity, infer every Nth frame)
+    LEVELS = [(1, 1), (0, 1), (0, 2), (0, 3)]
+
+    def __init__(self, target_fps=30, slow_speed=0.5, cooldown=45, smoothing=0.1, retry=900):
+        self.budget = 1.0 / target_fps
+        self.slow_speed = slow_speed    # wrist speed (frame widths/s) below which skipping is allowed
+        self.cooldown = cooldown        # results to wait between level changes
+        self.smoothing = smoothing      # EMA weight for the inference time
+        self.retry = retry              # results before a model that didn't fit is tried again
+        self.level = 0
+        self.inference_time = 0.0
+        self.model_times = {}           # model_complexity -> (smoothed time, result count when measured)
+        self.speed = 0.0
+        self._frame = 0
+        self._results = 0
+        self._since_change = 0
+
+    @property
+    def model_complexity(self):
+        return self.LEVELS[self.level][0]
+
+    @property
+    def interval(self):
+        return self.LEVELS[self.level][1]
+
+    def update_motion(self, speed):
+        """Report the fastest hand speed seen in the latest result"""
+        self.speed = speed
+
+    def update_latency(self, seconds):
+        """Report how long inference took for the latest result"""
+        if self.inference_time:
+            self.inference_time += self.smoothing * (seconds - self.inference_time)
+        else:
+            self.inference_time = seconds
+        self._results += 1
+        self.model_times[self.model_complexity] = (self.inference_time, self._results)
+        self._since_change += 1
+        self._adapt()
+
+    def should_infer(self):
+        self._frame += 1
+        if self.speed > self.slow_speed:
+            return True
+        return self._frame % self.interval == 0
+
+    def _adapt(self):
+        if self._since_change < self.cooldown:
+            return
+        # Inferring every Nth frame leaves N frame budgets per inference
+        if self.inference_time > self.budget * self.interval * 1.15 and self.level < len(self.LEVELS) - 1:
+            self._step(1)
+        elif self.level > 0 and self._fits(self.level - 1):
+            self._step(-1)
+
+    def _fits(self, level):
+        """Whether inference at `level` should fit comfortably within its budget"""
+        complexity, interval = self.LEVELS[level]
+        expected = self.inference_time
+        if complexity != self.model_complexity:
+            measured = self.model_times.get(complexity)
+            if measured is not None and self._results - measured[1] < self.retry:
+                expected = measured[0]
+        return expected < self.budget * interval * 0.7
+
+    def _step(self, delta):
+        self.level += delta
+        self._since_change = 0
+        self.inference_time = 0.0   # the old level's timings don't apply any more
+
+
+class asyncHandDetector(handDetector):
+    """handDetector that runs MediaPipe on a worker thread.
+
+    findHands() only hands the frame to the worker and picks up the newest
+    finished result from a one-slot mailbox, so the caller renders at its
+    own rate while inference runs as fast as the CPU allows. Results may
+    belong to an older frame; see result_time / staleness().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cond = threading.Condition()
+        self._pending = None   # (imgRGB, timestamp, slot) waiting for the worker
+        self._working = -1     # pooled RGB slot the worker is reading
+        self._mailbox = None   # (results, timestamp, latency) waiting for the caller
+        self._running = False
+        self._thread = None
+        self._builtComplexity = self.modelComplexity
+        self.on_result = None          # called (on the worker thread) when a result is ready
+
+        self.result_id = 0             # increments with every new result picked up
+        self.inference_latency = 0.0   # seconds spent in hands.process() for that result
+        self.frames_submitted = 0
+        self.frames_skipped = 0        # replaced before the worker got to them
+
+        self.start()
+
+    def findHands(self, img, draw=True, timestamp=None):
+        """Queue img (captured at timestamp) for detection and use the latest available result"""
+        if self._scheduleInference():
+            self.submit(img, timestamp)
+        self.poll()
+        if draw:
+            self._drawHands(img)
+        return img
+
+    def submit(self, img, timestamp=None):
+        """Hand a BGR frame to the worker, replacing any frame it hasn't started"""
+        with self._cond:
+            busy = (self._pending[2] if self._pending else -1, self._working)
+        # Three pooled RGB buffers: pending, being inferred, being written
+        slot = next(i for i in range(3) if i not in busy)
+        imgRGB = self._prepare(img, ('detect.rgb', slot))
+        with self._cond:
+            if self._pending is not None:
+                self.frames_skipped += 1
+            self._pending = (imgRGB, timestamp or time.time(), slot)
+            self.frames_submitted += 1
+            self._cond.notify()
+
+    def poll(self):
+        """Pick up a finished result if there is one; return True if it is new"""
+        with self._cond:
+            item, self._mailbox = self._mailbox, None
+        if item is None:
+            return False
+        self.results, self.result_time, self.inference_latency = item
+        self.result_id += 1
+        if self.scheduler is not None:
+            self.scheduler.update_latency(self.inference_latency)
+        return True
+
+    def staleness(self):
+        """Seconds between now and the capture of the frame behind self.results"""
+        if not self.result_time:
+            return 0.0
+        return time.time() - self.result_time
+
+    def setModelComplexity(self, complexity):
+        """Switch models on the worker thread, between two inferences"""
+        self.modelComplexity = complexity
+
+    def start(self):
+        """Start the worker thread (again, after close())"""
+        if self._running:
+            return
+        if self._thread is not None:
+            # Let a worker that was still inferring at close() finish first
+            self._thread.join()
+        with self._cond:
+            self._pending = None
+            self._mailbox = None
+            self._running = True
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop the worker thread; start() brings it back"""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._running and self._pending is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                (imgRGB, ts, self._working), self._pending = self._pending, None
+            if self._builtComplexity != self.modelComplexity:
+                self._builtComplexity = self.modelComplexity
+                old, self.hands = self.hands, self._createHands()
+                old.close()
+            start = time.time()
+            results = self.hands.process(imgRGB)
+            latency = time.time() - start
+            with self._cond:
+                self._working = -1
+                self._mailbox = (results, ts, latency)
+            if self.on_result is not None:
+                self.on_result()
+
+
 # ⛔ NOTE:
 # The `main()` test loop below is ONLY for desktop testing.
 # On Android (Kivy app), you will NOT run this directly.
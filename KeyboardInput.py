@@ -3,6 +3,11 @@ import numpy as np
 from collections import deque
 import time
 
+from TextHistory import TextHistory
+from TextIndex import TextHitIndex
+from TextObjects import TextObject, TextObjectStore
+from TextSprites import GlyphAdvances, TextSpriteCache
+
 class KeyboardInput:
     def __init__(self):
         
@@ -11,9 +16,7 @@ class KeyboardInput:
         self.cursor_visible = True
         self.cursor_timer = 0
         self.cursor_blink_interval = 0.5  # seconds
-        self.text_objects = deque(maxlen=20)  # Stores all text objects
         self.dragging = False
-        self.drag_object_index = -1
         self.drag_offset = (0, 0)
         self.default_font = cv2.FONT_HERSHEY_SIMPLEX
         self.default_scale = 1.0
@@ -24,16 +27,24 @@ class KeyboardInput:
         self.current_input_position = (640, 360)  # Center position
         self.input_dragging = False
         self.input_drag_offset = (0, 0)
-        self.selected_object_index = -1  # Track selected text object
-        self.text_history = []  # To store text object states for undo/redo
-        self.history_index = -1
 
         self.last_key_time = time.time()
         self.key_repeat_delay = 0.03  # Faster repeat rate
         self.initial_delay = 0.2  # Shorter initial delay
         self.last_key = None
-        self.smooth_text = []  # Buffer for smooth text rendering
+        self.smooth_text = deque()  # Fading-in characters, oldest first
         self.text_fade_in = 1.0  # Text fade-in animation
+        self.sprites = TextSpriteCache()  # Rendered text, reused until it changes
+        self.glyphs = GlyphAdvances(self.default_font, self.default_scale)
+        # Bounding boxes of text objects in a grid, for drag hit tests
+        self.text_index = TextHitIndex(
+            lambda obj: self.sprites.text_size(obj.text, obj.font, obj.scale, obj.thickness),
+            lambda obj: obj.position)
+        # All text objects plus the one selected index
+        self.text_objects = TextObjectStore(self.text_index)
+        # Undo/redo as a bounded log of add/delete/move commands
+        self.history = TextHistory(depth=100)
+        self.drag_start_position = None
 
     def toggle_keyboard_mode(self):
         self.active = not self.active
@@ -73,27 +84,24 @@ class KeyboardInput:
                 if self.text:
                     # Add new text object at left side
                     left_position = (50, self.current_input_position[1])
-                    self.text_objects.append({
-                        'text': self.text,
-                        'position': left_position,
-                        'color': self.default_color,
-                        'font': self.default_font,
-                        'scale': self.default_scale,
-                        'thickness': self.default_thickness,
-                        'selected': False
-                    })
+                    # Logged like add_text_object(), or undo couldn't remove it
+                    self.place_text_object(self.new_text_object(self.text, left_position))
                     self.text = ""
                     self.current_input_position = (640, 360)
             return True
         elif key == 8:  # Backspace
             if selected_index >= 0:
-                text = self.text_objects[selected_index]['text']
+                obj = self.text_objects[selected_index]
                 # Fast backspace when held
                 chars_to_delete = 1
                 if time_since_last_key < self.key_repeat_delay:
-                    chars_to_delete = min(3, len(text))
-                self.text_objects[selected_index]['text'] = text[:-chars_to_delete]
-                if not self.text_objects[selected_index]['text']:
+                    chars_to_delete = min(3, len(obj.text))
+                text = obj.text[:-chars_to_delete]
+                if text:
+                    self.edit_text(obj, text)
+                else:
+                    # Removing the last characters deletes the object; undo
+                    # brings it back with the text it had
                     self.delete_selected()
             else:
                 chars_to_delete = 1
@@ -103,12 +111,13 @@ class KeyboardInput:
             return True
         elif 32 <= key <= 126:  # Printable ASCII characters
             if selected_index >= 0:
-                self.text_objects[selected_index]['text'] += chr(key)
+                obj = self.text_objects[selected_index]
+                self.edit_text(obj, obj.text + chr(key))
                 # Add to smooth text buffer
                 self.smooth_text.append({
                     'char': chr(key),
                     'alpha': 0,
-                    'target_pos': len(self.text_objects[selected_index]['text']) - 1
+                    'target_pos': len(obj.text) - 1
                 })
             else:
                 self.text += chr(key)
@@ -124,62 +133,43 @@ class KeyboardInput:
 
     def get_selected_index(self):
         """Get the index of currently selected text object"""
-        for i, obj in enumerate(self.text_objects):
-            if obj['selected']:
-                return i
-        return -1
+        return self.text_objects.selected
+
+    def new_text_object(self, text, position):
+        """A text object in the default style"""
+        return TextObject(text, position, self.default_color, self.default_font,
+                          self.default_scale, self.default_thickness)
 
     def add_text_object(self):
         if not self.text:
             return
 
-        self.save_state()
-
-        self.text_objects.append({
-            'text': self.text,
-            'position': self.current_input_position,
-            'color': self.default_color,
-            'font': self.default_font,
-            'scale': self.default_scale,
-            'thickness': self.default_thickness,
-            'selected': False
-        })
+        self.place_text_object(self.new_text_object(self.text, self.current_input_position))
 
+    def place_text_object(self, obj):
+        """Add obj on top, recording it for undo"""
+        self.history.added(self.text_objects.append(obj), obj)
 
+    def edit_text(self, obj, text):
+        """Change obj's text; one typing run is one undo step"""
+        old = obj.text
+        self.text_objects.set_text(obj, text)
+        self.history.edited(obj, old, text)
 
     def delete_selected(self):
         """Delete the currently selected text object"""
-        if self.drag_object_index >= 0:
-            # Remove the selected object
-            if 0 <= self.drag_object_index < len(self.text_objects):
-                del self.text_objects[self.drag_object_index]
-            self.drag_object_index = -1
-
-    def save_state(self):
-        """Save current text objects state for undo/redo"""
-        # Truncate history if we're not at the end
-        if self.history_index < len(self.text_history) - 1:
-            self.text_history = self.text_history[:self.history_index + 1]
-
-        # Save current state
-        self.text_history.append(list(self.text_objects))
-        self.history_index = len(self.text_history) - 1
+        idx = self.text_objects.selected
+        if idx >= 0:
+            # Popping the selected object also clears the selection
+            self.history.deleted(idx, self.text_objects.pop(idx))
 
     def undo(self):
         """Undo the last text operation"""
-        if self.history_index > 0:
-            self.history_index -= 1
-            self.text_objects = deque(list(self.text_history[self.history_index]), maxlen=20)
-            return True
-        return False
+        return self.history.undo(self.text_objects) is not None
 
     def redo(self):
         """Redo the last undone text operation"""
-        if self.history_index < len(self.text_history) - 1:
-            self.history_index += 1
-            self.text_objects = deque(list(self.text_history[self.history_index]), maxlen=20)
-            return True
-        return False
+        return self.history.redo(self.text_objects) is not None
 
     def update(self, dt):
         if not self.active:
@@ -191,51 +181,38 @@ class KeyboardInput:
             self.cursor_timer = 0
             self.cursor_visible = not self.cursor_visible
 
-        # Update smooth text animations
-        for char_data in self.smooth_text[:]:
+        # Update smooth text animations; every character fades in at the
+        # same rate, so they finish in the order they were typed
+        for char_data in self.smooth_text:
             char_data['alpha'] = min(1.0, char_data['alpha'] + dt * 5)
-            if char_data['alpha'] >= 1.0:
-                self.smooth_text.remove(char_data)
+        while self.smooth_text and self.smooth_text[0]['alpha'] >= 1.0:
+            self.smooth_text.popleft()
 
     def draw(self, img):
-        # Draw all existing text objects
+        # Draw all existing text objects (outline + fill, rendered once per change)
+        selected = self.text_objects.selected
         for i, obj in enumerate(self.text_objects):
-            # Draw outline
-            cv2.putText(
-                img,
-                obj['text'],
-                obj['position'],
-                obj['font'],
-                obj['scale'],
+            sprite = self.sprites.get(
+                obj.text,
+                obj.font,
+                obj.scale,
+                obj.color,
+                obj.thickness,
                 self.outline_color,
                 self.outline_thickness
             )
-            # Draw main text
-            cv2.putText(
-                img,
-                obj['text'],
-                obj['position'],
-                obj['font'],
-                obj['scale'],
-                obj['color'],
-                obj['thickness']
-            )
+            self.sprites.blit(img, sprite, obj.position)
 
             # Draw selection rectangle if selected
-            if obj['selected']:
-                text_size = cv2.getTextSize(
-                    obj['text'],
-                    obj['font'],
-                    obj['scale'],
-                    obj['thickness']
-                )[0]
+            if i == selected:
+                text_size = sprite.size
                 top_left = (
-                    obj['position'][0] - 5,
-                    obj['position'][1] - text_size[1] - 5
+                    obj.position[0] - 5,
+                    obj.position[1] - text_size[1] - 5
                 )
                 bottom_right = (
-                    obj['position'][0] + text_size[0] + 5,
-                    obj['position'][1] + 5
+                    obj.position[0] + text_size[0] + 5,
+                    obj.position[1] + 5
                 )
                 cv2.rectangle(img, top_left, bottom_right, (0, 255, 0), 2)
 
@@ -249,11 +226,10 @@ class KeyboardInput:
                 alpha = char_data['alpha']
                 color = tuple(int(c * alpha) for c in self.default_color)
                 
-                text_before = base_text[:pos]
-                text_size = cv2.getTextSize(text_before, self.default_font, 
-                                          self.default_scale, self.default_thickness)[0]
-                
-                char_pos = (self.current_input_position[0] + text_size[0],
+                # Width of base_text[:pos], from the running glyph sums
+                text_width = self.glyphs.prefix_width(base_text, pos, self.default_thickness)
+
+                char_pos = (self.current_input_position[0] + text_width,
                            self.current_input_position[1])
                 
                 # Draw animated character
@@ -261,18 +237,13 @@ class KeyboardInput:
                            self.default_scale, color, self.default_thickness)
 
             # Draw main text
-            cv2.putText(img, self.text, self.current_input_position,
-                       self.default_font, self.default_scale,
-                       self.default_color, self.default_thickness)
+            sprite = self.sprites.get(self.text, self.default_font, self.default_scale,
+                                      self.default_color, self.default_thickness)
+            self.sprites.blit(img, sprite, self.current_input_position)
 
             # Draw cursor
             if self.cursor_visible:
-                text_size = cv2.getTextSize(
-                    self.text,
-                    self.default_font,
-                    self.default_scale,
-                    self.default_thickness
-                )[0]
+                text_size = sprite.size
                 cursor_pos = (
                     self.current_input_position[0] + text_size[0],
                     self.current_input_position[1]
@@ -286,45 +257,31 @@ class KeyboardInput:
                 )
 
     def check_drag_start(self, x, y):
-        # First check if we're selecting existing text objects
-        for i, obj in enumerate(reversed(self.text_objects)):
-            idx = len(self.text_objects) - 1 - i  # Get original index
-            text_size = cv2.getTextSize(
-                obj['text'],
-                obj['font'],
-                obj['scale'],
-                obj['thickness']
-            )[0]
-
-            text_left = obj['position'][0]
-            text_right = obj['position'][0] + text_size[0]
-            text_top = obj['position'][1] - text_size[1]
-            text_bottom = obj['position'][1]
+        # First check if we're selecting existing text objects (topmost first)
+        idx = self.text_objects.hit(x, y)
+        if idx >= 0:
+            obj = self.text_objects[idx]
+            # Double click detection (you may need to implement this)
+            # For now, single click will make text editable
+            # Select this object (and only this one)
+            self.text_objects.select(idx)
+            self.history.end_edit()
+            # The selected object is the one being dragged
+            self.drag_offset = (x - obj.position[0], y - obj.position[1])
+            self.drag_start_position = obj.position
+            self.dragging = True
+            # Make keyboard active when selecting text
+            self.active = True
+            return True
 
-            if (text_left <= x <= text_right and
-                    text_top <= y <= text_bottom):
-                # Double click detection (you may need to implement this)
-                # For now, single click will make text editable
-                # Deselect all other objects
-                for other_obj in self.text_objects:
-                    other_obj['selected'] = False
-                # Select this object
-                self.text_objects[idx]['selected'] = True
-                self.drag_object_index = idx
-                self.drag_offset = (x - obj['position'][0], y - obj['position'][1])
-                self.dragging = True
-                # Make keyboard active when selecting text
-                self.active = True
-                return True
-    
         # Then check if we're dragging current input text (only if keyboard active)
         if self.active and (self.text or self.cursor_visible):
-            text_size = cv2.getTextSize(
+            text_size = self.sprites.text_size(
                 self.text,
                 self.default_font,
                 self.default_scale,
                 self.default_thickness
-            )[0]
+            )
 
             text_left = self.current_input_position[0]
             text_right = self.current_input_position[0] + text_size[0]
@@ -341,9 +298,8 @@ class KeyboardInput:
                 return True
 
         # If clicking elsewhere, deselect all
-        for obj in self.text_objects:
-            obj['selected'] = False
-        self.drag_object_index = -1
+        self.text_objects.clear_selection()
+        self.history.end_edit()
         return False
 
     def update_drag(self, x, y):
@@ -353,19 +309,20 @@ class KeyboardInput:
                 x - self.input_drag_offset[0],
                 y - self.input_drag_offset[1]
             )
-        elif self.dragging and self.drag_object_index >= 0:
-            # Update position of dragged text object
-            obj = self.text_objects[self.drag_object_index]
+        elif self.dragging and self.text_objects.selected >= 0:
+            # Update position of dragged (selected) text object
+            obj = self.text_objects.selected_object
             new_pos = (x - self.drag_offset[0], y - self.drag_offset[1])
-            self.text_objects[self.drag_object_index]['position'] = new_pos
+            self.text_objects.set_position(obj, new_pos)
 
     def end_drag(self):
+        obj = self.text_objects.selected_object
+        if self.dragging and obj is not None:
+            self.history.moved(obj, self.drag_start_position, obj.position)
         self.input_dragging = False
         self.dragging = False
-        self.drag_object_index = -1
 
     def clear_selection(self):
         """Clear all text selections"""
-        for obj in self.text_objects:
-            obj['selected'] = False
-        self.drag_object_index = -1
\ No newline at end of file
+        self.text_objects.clear_selection()
+        self.history.end_edit()
\ No newline at end of file
@@ -0,0 +1,192 @@
+# LandmarkStream.py
+import struct
+
+import numpy as np
+from mediapipe.framework.formats import classification_pb2, landmark_pb2
+
+import HandTrackingModule as htm
+
+# File layout (little endian):
+#   header  b'LMS1'
+#   record  float64 result_time, uint8 hand count (NO_RESULT = no new result that frame)
+#   hand    uint8 handedness (0 Left, 1 Right), float32 score,
+#           21 x (x, y) float32, 21 x z float16
+MAGIC = b'LMS1'
+NO_RESULT = 0xFF
+LABELS = ('Left', 'Right')
+_RECORD = struct.Struct('<dB')
+_HAND = struct.Struct('<Bf')
+_XY_BYTES = 21 * 2 * 4
+_Z_BYTES = 21 * 2
+
+
+class LandmarkRecorder:
+    """Write a detector's per-frame landmark output to a compact binary file.
+
+    Call write(detector) once per frame, right after findHands(). Frames
+    where the detector kept its previous result (async detector, adaptive
+    scheduler) are stored as a 9-byte marker, so replay keeps the frame
+    cadence of the live run.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._last = None
+        self.frames = 0
+
+    def write(self, detector):
+        results = detector.results
+        self.frames += 1
+        if results is self._last:
+            self._file.write(_RECORD.pack(detector.result_time, NO_RESULT))
+            return
+        self._last = results
+        hands = results.multi_hand_landmarks if results and results.multi_hand_landmarks else []
+        handedness = (results.multi_handedness or []) if hands else []
+        parts = [_RECORD.pack(detector.result_time, len(hands))]
+        for i, handLms in enumerate(hands):
+            label, score = 'Right', 0.0
+            if i < len(handedness):
+                cls = handedness[i].classification[0]
+                label, score = cls.label, cls.score
+            pts = np.array([(lm.x, lm.y, lm.z) for lm in handLms.landmark])
+            parts.append(_HAND.pack(LABELS.index(label), score))
+            parts.append(pts[:, :2].astype('<f4').tobytes())
+            parts.append(pts[:, 2].astype('<f2').tobytes())
+        self._file.write(b''.join(parts))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def read_stream(path):
+    """Load a recording as a list of (result_time, hands) records.
+
+    hands is None for frames without a new result, otherwise a list of
+    (label, score, (21, 3) float32 [x, y, z]) tuples.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] != MAGIC:
+        raise ValueError(f"Not a landmark stream: {path}")
+    records = []
+    pos = 4
+    while pos < len(data):
+        ts, count = _RECORD.unpack_from(data, pos)
+        pos += _RECORD.size
+        if count == NO_RESULT:
+            records.append((ts, None))
+            continue
+        hands = []
+        for _ in range(count):
+            label, score = _HAND.unpack_from(data, pos)
+            pos += _HAND.size
+            pts = np.empty((21, 3), np.float32)
+            pts[:, :2] = np.frombuffer(data, '<f4', 42, pos).reshape(21, 2)
+            pos += _XY_BYTES
+            pts[:, 2] = np.frombuffer(data, '<f2', 21, pos)
+            pos += _Z_BYTES
+            hands.append((LABELS[label], score, pts))
+        records.append((ts, hands))
+    return records
+
+
+class _Results:
+    """Stand-in for MediaPipe's results object"""
+    __slots__ = ('multi_hand_landmarks', 'multi_handedness')
+
+    def __init__(self, hands):
+        self.multi_hand_landmarks = []
+        self.multi_handedness = []
+        for label, score, pts in hands:
+            lms = landmark_pb2.NormalizedLandmarkList()
+            for x, y, z in pts.tolist():
+                lms.landmark.add(x=x, y=y, z=z)
+            cls = classification_pb2.ClassificationList()
+            cls.classification.add(index=LABELS.index(label), label=label, score=score)
+            self.multi_hand_landmarks.append(lms)
+            self.multi_handedness.append(cls)
+        if not hands:
+            # MediaPipe reports "no hands" as None
+            self.multi_hand_landmarks = self.multi_handedness = None
+
+
+class replayHandDetector(htm.handDetector):
+    """handDetector that plays back a LandmarkRecorder file instead of running MediaPipe.
+
+    Each findHands() call advances one recorded frame, so findPosition,
+    findAllHands and fingersUp behave exactly as they did live, at the cost
+    of a list lookup. Result times come from the recording, which keeps
+    tracking deterministic; leave extrapolate off, since it measures against
+    the wall clock. When looping, each pass is shifted by the recording's
+    length, so result times keep increasing and the landmark filters never
+    see a step back in time.
+    """
+
+    def __init__(self, path, loop=False, **kwargs):
+        super().__init__(**kwargs)
+        self.loop = loop
+        self.frames = [(ts, None if hands is None else _Results(hands))
+                       for ts, hands in read_stream(path)]
+        self.frame_index = 0
+        self.loop_offset = 0.0      # added to recorded times on the current pass
+        self._period = self._loop_period()
+        self.finished = False
+        self.result_id = 0
+        self.inference_latency = 0.0
+        self.on_result = None
+
+    def _loop_period(self):
+        """Recording length plus one typical frame gap: how far each pass is shifted"""
+        times = np.array([ts for ts, results in self.frames if results is not None])
+        if len(times) < 2:
+            return 1.0 / 30
+        gaps = np.diff(times)
+        gaps = gaps[gaps > 0]
+        gap = float(np.median(gaps)) if len(gaps) else 1.0 / 30
+        return float(times[-1] - times[0]) + gap
+
+    def _createHands(self):
+        return None
+
+    def setModelComplexity(self, complexity):
+        self.modelComplexity = complexity
+
+    def findHands(self, img, draw=True, timestamp=None):
+        """Step to the next recorded frame (its recorded time is used, not timestamp)"""
+        if self.frame_index >= len(self.frames):
+            if not self.loop or not self.frames:
+                self.finished = True
+                self.results = None
+                return img
+            self.frame_index = 0
+            self.loop_offset += self._period
+        ts, results = self.frames[self.frame_index]
+        self.frame_index += 1
+        if results is not None and self._scheduleInference():
+            self.results = results
+            self.result_time = ts + self.loop_offset
+            self.result_id += 1
+        if draw:
+            self._drawHands(img)
+        return img
+
+    # Same surface as asyncHandDetector, so it can stand in for the painter's detector
+    def poll(self):
+        return False
+
+    def staleness(self):
+        return 0.0
+
+    def close(self):
+        pass
@@ -0,0 +1,139 @@
+# PerfMonitor.py
+import json
+import time
+
+import cv2
+import numpy as np
+
+
+class PerfMonitor:
+    """Rolling per-stage timings for the painter pipeline.
+
+    Stages are timed with lap(): each call records the time since the
+    previous lap (or start()) under a name. Work done on other threads
+    (capture, inference) is reported with record(). Every stage keeps the
+    last `window` samples, so percentiles describe recent behaviour.
+    end_frame() also records 'interval', the time between displayed frames,
+    which is what fps() reports; work that isn't a displayed frame is closed
+    with end_frame(name) under its own stage instead.
+
+    With export_path set, a JSON line with the current percentiles is
+    appended every export_interval seconds; `context` may return a dict of
+    extra fields (counters etc.) to include in each line.
+    """
+
+    def __init__(self, window=300, export_path=None, export_interval=5.0, context=None):
+        self.window = window
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self.context = context
+        self.stages = {}          # name -> [samples (seconds), count]
+        self.frames = 0
+        self._origin = 0.0
+        self._frame_start = 0.0
+        self._last_end = 0.0      # when the previous displayed frame ended
+        self._last_export = time.perf_counter()
+        self._export_file = None
+        self._hud_lines = []
+        self._hud_time = 0.0
+
+    # --------- Recording ----------
+    def start(self):
+        """Begin a frame; the next lap() measures from here"""
+        self._origin = self._frame_start = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.record(name, now - self._origin)
+        self._origin = now
+
+    def record(self, name, seconds):
+        entry = self.stages.get(name)
+        if entry is None:
+            entry = self.stages[name] = [np.zeros(self.window), 0]
+        entry[0][entry[1] % self.window] = seconds
+        entry[1] += 1
+
+    def end_frame(self, name='frame'):
+        """Close the frame started with start(); exports if it's time to.
+
+        Pass another name for work that started with start() but didn't
+        produce a displayed frame: it is recorded under that stage and
+        doesn't count towards 'frame', 'interval' or fps().
+        """
+        now = time.perf_counter()
+        self.record(name, now - self._frame_start)
+        if name != 'frame':
+            return
+        if self._last_end:
+            self.record('interval', now - self._last_end)
+        self._last_end = now
+        self.frames += 1
+        if self.export_path and now - self._last_export >= self.export_interval:
+            self._last_export = now
+            self.export(**(self.context() if self.context else {}))
+
+    # --------- Reporting ----------
+    def percentiles(self, name):
+        """(p50, p95, p99) of a stage in milliseconds, or None if never recorded"""
+        entry = self.stages.get(name)
+        if entry is None or not entry[1]:
+            return None
+        samples = entry[0][:min(entry[1], self.window)]
+        return tuple(np.percentile(samples, (50, 95, 99)) * 1000.0)
+
+    def summary(self):
+        out = {}
+        for name in self.stages:
+            p50, p95, p99 = self.percentiles(name)
+            out[name] = {'p50': round(p50, 3), 'p95': round(p95, 3),
+                         'p99': round(p99, 3), 'count': self.stages[name][1]}
+        return out
+
+    def fps(self):
+        """Displayed frames per second, from the median time between end_frame() calls"""
+        p = self.percentiles('interval')
+        return 1000.0 / p[0] if p and p[0] > 0 else 0.0
+
+    def export(self, **extra):
+        """Append one JSON line with the current summary (plus any extra fields)"""
+        if not self.export_path:
+            return
+        if self._export_file is None:
+            self._export_file = open(self.export_path, 'a')
+        line = {'time': time.time(), 'frames': self.frames, 'stages': self.summary()}
+        line.update(extra)
+        self._export_file.write(json.dumps(line) + "\n")
+        self._export_file.flush()
+
+    def close(self):
+        if self._export_file is not None:
+            self._export_file.close()
+            self._export_file = None
+
+    # --------- HUD ----------
+    def hud_lines(self, refresh=0.5):
+        """Text lines for the overlay; recomputed at most every `refresh` seconds"""
+        now = time.perf_counter()
+        if now - self._hud_time >= refresh:
+            self._hud_time = now
+            lines = [f"{self.fps():5.1f} fps", "stage        p50    p95    p99 ms"]
+            for name in self.stages:
+                p50, p95, p99 = self.percentiles(name)
+                lines.append(f"{name:<10}{p50:6.1f} {p95:6.1f} {p99:6.1f}")
+            self._hud_lines = lines
+        return self._hud_lines
+
+    def draw_hud(self, img, origin=(10, 20)):
+        lines = self.hud_lines()
+        if not lines:
+            return img
+        x, y = origin
+        h, w = img.shape[:2]
+        x1, y1 = min(w, x + 300), min(h, y + 18 * len(lines))
+        # Darken the panel so the text stays readable over any frame
+        panel = img[max(0, y - 15):y1, x - 5:x1]
+        panel >>= 1
+        for i, text in enumerate(lines):
+            cv2.putText(img, text, (x, y + 18 * i), cv2.FONT_HERSHEY_PLAIN, 1.0, (0, 255, 0), 1)
+        return img
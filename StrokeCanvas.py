@@ -0,0 +1,240 @@
+# StrokeCanvas.py
+import cv2
+import numpy as np
+
+
+class Stroke:
+    """One continuous stroke, in normalized (0..1) canvas coordinates."""
+    __slots__ = ('points', 'color', 'width', 'tool', 'bbox')
+
+    def __init__(self, color, width, tool='brush'):
+        self.points = []        # [(x, y), ...] while drawing, (N, 2) float32 once ended
+        self.color = color
+        self.width = width      # fraction of the canvas width
+        self.tool = tool        # 'brush', 'eraser' or 'clear'
+        self.bbox = None        # (x0, y0, x1, y1), normalized, once ended
+
+    def finish(self):
+        self.points = np.asarray(self.points, np.float32).reshape(-1, 2)
+        if self.tool == 'clear' or not len(self.points):
+            self.bbox = (0.0, 0.0, 1.0, 1.0)
+        else:
+            (x0, y0), (x1, y1) = self.points.min(axis=0), self.points.max(axis=0)
+            self.bbox = (float(x0), float(y0), float(x1), float(y1))
+
+
+class StrokeCanvas:
+    """Stroke list as the source of truth, with a raster cache for display.
+
+    New points are rasterized into `canvas` as they arrive. Undo drops the
+    last stroke and re-renders only the strokes overlapping its bounding
+    box; redo draws the stroke back on top. Because strokes are stored in
+    normalized coordinates, resize() re-renders at any resolution, and the
+    history costs memory per point rather than per pixel.
+
+    The history is bounded: undo goes back at most `max_strokes` strokes,
+    fewer if they hold more than `max_points` points between them. Older
+    strokes are baked into the `base` raster, can no longer be undone, and
+    are resampled rather than re-rendered on resize(). Undo therefore never
+    replays more than `max_strokes` strokes.
+    """
+
+    def __init__(self, width=1024, height=600, max_strokes=100, max_points=50000):
+        self.canvas = np.zeros((height, width, 3), np.uint8)
+        self.base = np.zeros_like(self.canvas)  # strokes folded out of the history
+        self.max_strokes = max_strokes
+        self.max_points = max_points
+        self.strokes = []
+        self.redo_strokes = []
+        self._points = 0    # points in the finished strokes of self.strokes
+        self._active = {}   # key (e.g. hand id) -> Stroke being drawn
+        self._scratch = None
+        self.dirty = None   # (x0, y0, x1, y1) changed since the last take_dirty()
+
+    @property
+    def size(self):
+        return self.canvas.shape[1], self.canvas.shape[0]
+
+    # --------- Drawing ----------
+    def begin_stroke(self, key, color, width_px, tool='brush'):
+        """Start a stroke for `key`; width_px is in current canvas pixels"""
+        self.end_stroke(key)
+        stroke = Stroke(color, width_px / float(self.size[0]), tool)
+        self._active[key] = stroke
+        self.strokes.append(stroke)
+        return stroke
+
+    def add_point(self, key, x, y):
+        """Append a pixel-space point to `key`'s stroke and draw the new segment"""
+        stroke = self._active.get(key)
+        if stroke is None:
+            return
+        w, h = self.size
+        stroke.points.append((x / float(w), y / float(h)))
+        pts = stroke.points[-2:]
+        self._mark_dirty(self._draw_segment(self.canvas, stroke, pts[0], pts[-1]))
+        # Redo stays available until the new stroke actually goes somewhere:
+        # the hand is often still in the draw pose right after an undo
+        if self.redo_strokes and pts[0] != pts[-1]:
+            self.redo_strokes = []
+
+    def end_stroke(self, key):
+        stroke = self._active.pop(key, None)
+        if stroke is None:
+            return
+        stroke.finish()
+        if self.redo_strokes:
+            # It never got a segment (that would have cleared redo): drop it
+            # so it can't end up under the strokes redo brings back
+            self.strokes.remove(stroke)
+            if len(stroke.points):
+                self._rerender(self._pixel_bbox(stroke))
+            return
+        self._points += len(stroke.points)
+        self._fold()
+
+    def end_all(self):
+        for key in list(self._active):
+            self.end_stroke(key)
+
+    @property
+    def drawing(self):
+        return bool(self._active)
+
+    def is_drawing(self, key):
+        return key in self._active
+
+    def active_keys(self):
+        return list(self._active)
+
+    def clear(self):
+        """Wipe the canvas as an undoable operation"""
+        self.end_all()
+        stroke = Stroke((0, 0, 0), 0.0, 'clear')
+        stroke.finish()
+        self.strokes.append(stroke)
+        self.redo_strokes = []
+        self.canvas[...] = 0
+        self._mark_dirty((0, 0) + self.size)
+        self._fold()
+
+    # --------- Undo / redo ----------
+    def undo(self):
+        self.end_all()
+        if not self.strokes:
+            return False
+        stroke = self.strokes.pop()
+        self._points -= len(stroke.points)
+        self.redo_strokes.append(stroke)
+        self._rerender(self._pixel_bbox(stroke))
+        return True
+
+    def redo(self):
+        self.end_all()
+        if not self.redo_strokes:
+            return False
+        stroke = self.redo_strokes.pop()
+        self.strokes.append(stroke)
+        self._points += len(stroke.points)
+        self._render_stroke(self.canvas, stroke)
+        self._mark_dirty(self._pixel_bbox(stroke))
+        return True
+
+    def _fold(self):
+        """Bake the oldest finished strokes into `base` until the history fits its budget"""
+        n = 0
+        while (n < len(self.strokes) and self.strokes[n].bbox is not None and
+               (len(self.strokes) - n > self.max_strokes or self._points > self.max_points)):
+            stroke = self.strokes[n]
+            self._render_stroke(self.base, stroke)
+            self._points -= len(stroke.points)
+            n += 1
+        del self.strokes[:n]
+
+    # --------- Rendering ----------
+    def resize(self, width, height):
+        """Re-render every stroke at a new canvas resolution"""
+        self.base = cv2.resize(self.base, (width, height), interpolation=cv2.INTER_NEAREST)
+        self.canvas = np.zeros((height, width, 3), np.uint8)
+        self._rerender((0, 0, width, height))
+
+    def render(self, width, height):
+        """Return a fresh raster of all strokes at any resolution"""
+        saved = self.canvas, self.base
+        self.resize(width, height)
+        out = self.canvas
+        self.canvas, self.base = saved
+        return out
+
+    def _pixel_bbox(self, stroke):
+        w, h = self.size
+        x0, y0, x1, y1 = stroke.bbox
+        r = int(stroke.width * w) // 2 + 2
+        return (max(0, int(x0 * w) - r), max(0, int(y0 * h) - r),
+                min(w, int(x1 * w) + r + 1), min(h, int(y1 * h) + r + 1))
+
+    def _rerender(self, bbox):
+        """Clear bbox and replay the strokes that overlap it, in order"""
+        x0, y0, x1, y1 = bbox
+        if x0 >= x1 or y0 >= y1:
+            return
+        # cv2's thick lines rasterize differently depending on the image they
+        # are clipped to, so replay on a full-size scratch canvas (same
+        # geometry as the live one) and copy back only the bbox
+        if self._scratch is None or self._scratch.shape != self.canvas.shape:
+            self._scratch = np.zeros_like(self.canvas)
+        scratch = self._scratch
+        # Nothing before the last clear can show through; without one,
+        # replay starts from the baked strokes
+        start = 0
+        for i in range(len(self.strokes) - 1, -1, -1):
+            if self.strokes[i].tool == 'clear':
+                start = i + 1
+                break
+        if start:
+            scratch[y0:y1, x0:x1] = 0
+        else:
+            scratch[y0:y1, x0:x1] = self.base[y0:y1, x0:x1]
+        for stroke in self.strokes[start:]:
+            if stroke.bbox is not None:
+                sx0, sy0, sx1, sy1 = self._pixel_bbox(stroke)
+                if not (sx0 < x1 and x0 < sx1 and sy0 < y1 and y0 < sy1):
+                    continue
+            self._render_stroke(scratch, stroke)
+        self.canvas[y0:y1, x0:x1] = scratch[y0:y1, x0:x1]
+        self._mark_dirty(bbox)
+
+    def _mark_dirty(self, rect):
+        if self.dirty is None:
+            self.dirty = tuple(rect)
+        else:
+            self.dirty = (min(self.dirty[0], rect[0]), min(self.dirty[1], rect[1]),
+                          max(self.dirty[2], rect[2]), max(self.dirty[3], rect[3]))
+
+    def take_dirty(self):
+        """Return the region changed since the last call (or None) and reset it"""
+        dirty, self.dirty = self.dirty, None
+        return dirty
+
+    def _render_stroke(self, img, stroke):
+        pts = stroke.points
+        if stroke.tool == 'clear':
+            img[...] = 0
+            return
+        if not len(pts):
+            return
+        self._draw_segment(img, stroke, pts[0], pts[0])
+        for i in range(1, len(pts)):
+            self._draw_segment(img, stroke, pts[i - 1], pts[i])
+
+    def _draw_segment(self, img, stroke, p0, p1):
+        # Same rounding for incremental and replayed drawing, so both land
+        # on the same pixels
+        w, h = self.size
+        thickness = max(1, int(round(stroke.width * w)))
+        a = (int(round(p0[0] * w)), int(round(p0[1] * h)))
+        b = (int(round(p1[0] * w)), int(round(p1[1] * h)))
+        cv2.line(img, a, b, stroke.color, thickness)
+        r = thickness // 2 + 2
+        return (max(0, min(a[0], b[0]) - r), max(0, min(a[1], b[1]) - r),
+                min(w, max(a[0], b[0]) + r + 1), min(h, max(a[1], b[1]) + r + 1))
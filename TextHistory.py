@@ -0,0 +1,94 @@
+# TextHistory.py
+from collections import deque
+
+
+class TextHistory:
+    """Undo/redo for text objects as a log of small commands.
+
+    Each entry holds only what one operation touched:
+        ('add', index, obj)        obj was inserted at index
+        ('delete', index, obj)     obj was removed from index
+        ('move', obj, old, new)    obj's position changed from old to new
+        ('edit', obj, old, new)    obj's text changed from old to new
+    Undo applies the inverse to a TextObjectStore in place and redo
+    re-applies the entry, so neither copies the other objects. Only the
+    newest `depth` entries are kept. Keystrokes into one object merge into
+    a single edit until end_edit() or any other entry.
+    """
+
+    def __init__(self, depth=100):
+        self.undo_log = deque(maxlen=depth)
+        self.redo_log = []
+        self._editing = None    # object whose open edit the next keystroke extends
+
+    # --------- Recording ----------
+    def record(self, *command):
+        self.undo_log.append(command)
+        self.redo_log.clear()
+        self._editing = None
+
+    def added(self, index, obj):
+        self.record('add', index, obj)
+
+    def deleted(self, index, obj):
+        self.record('delete', index, obj)
+
+    def moved(self, obj, old, new):
+        if old != new:
+            self.record('move', obj, old, new)
+
+    def edited(self, obj, old, new):
+        if old == new:
+            return
+        if obj is self._editing and self.undo_log[-1][3] == old:
+            self.undo_log[-1] = ('edit', obj, self.undo_log[-1][2], new)
+            self.redo_log.clear()
+            return
+        self.record('edit', obj, old, new)
+        self._editing = obj
+
+    def end_edit(self):
+        """The next keystroke starts a new edit entry"""
+        self._editing = None
+
+    def clear(self):
+        self.undo_log.clear()
+        self.redo_log.clear()
+        self._editing = None
+
+    # --------- Undo / redo ----------
+    def undo(self, objects):
+        """Revert the newest entry on objects; returns it, or None if there is none"""
+        if not self.undo_log:
+            return None
+        command = self.undo_log.pop()
+        self._editing = None
+        self._apply(objects, command, forward=False)
+        self.redo_log.append(command)
+        return command
+
+    def redo(self, objects):
+        if not self.redo_log:
+            return None
+        command = self.redo_log.pop()
+        self._editing = None
+        self._apply(objects, command, forward=True)
+        self.undo_log.append(command)
+        return command
+
+    def _apply(self, objects, command, forward):
+        kind = command[0]
+        if kind == 'move':
+            _, obj, old, new = command
+            objects.set_position(obj, new if forward else old)
+            return
+        if kind == 'edit':
+            _, obj, old, new = command
+            objects.set_text(obj, new if forward else old)
+            return
+        _, i, obj = command
+        if (kind == 'add') == forward:
+            objects.insert(i, obj)
+        else:
+            # Entries are undone newest first, so obj is normally still at i
+            objects.pop(objects.find(obj, i))
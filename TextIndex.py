@@ -0,0 +1,130 @@
+# TextIndex.py
+
+
+class TextGrid:
+    """Uniform grid of bounding boxes for point hit tests.
+
+    Each box is registered in every cell it overlaps, so a query only looks
+    at the boxes in one cell: O(1) on average however many boxes there are.
+    Boxes are inclusive on all sides, like the original hit test.
+    """
+
+    def __init__(self, cell=64):
+        self.cell = cell
+        self._cells = {}    # (col, row) -> set of keys
+        self._boxes = {}    # key -> (x0, y0, x1, y1)
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def _span(self, box):
+        c = self.cell
+        x0, y0, x1, y1 = box
+        for row in range(y0 // c, y1 // c + 1):
+            for col in range(x0 // c, x1 // c + 1):
+                yield col, row
+
+    def insert(self, key, box):
+        self.remove(key)
+        self._boxes[key] = box
+        for cell in self._span(box):
+            self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        box = self._boxes.pop(key, None)
+        if box is None:
+            return
+        for cell in self._span(box):
+            keys = self._cells.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._cells[cell]
+
+    def clear(self):
+        self._cells.clear()
+        self._boxes.clear()
+
+    def query(self, x, y):
+        """Keys whose box contains (x, y)"""
+        keys = self._cells.get((x // self.cell, y // self.cell))
+        if not keys:
+            return []
+        hits = []
+        for key in keys:
+            x0, y0, x1, y1 = self._boxes[key]
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                hits.append(key)
+        return hits
+
+
+class TextHitIndex:
+    """Hit testing for a list of text objects, kept in a TextGrid.
+
+    `measure(obj)` returns the object's (width, height) and `origin(obj)`
+    its text origin (bottom-left, as for putText). Call added() / changed()
+    / removed() as objects are appended, edited or moved, and deleted,
+    passing the owner's change counter as `version`. hit() rebuilds the
+    index first if it is given a different list, or a version it wasn't
+    told about (a change that skipped the notifications).
+    """
+
+    def __init__(self, measure, origin, cell=64):
+        self.measure = measure
+        self.origin = origin
+        self.grid = TextGrid(cell)
+        self._objects = None    # the list that is indexed
+        self._version = None    # owner's change counter as of the last update
+        self._order = None      # id(obj) -> list index; rebuilt lazily after deletes
+
+    def _box(self, obj):
+        w, h = self.measure(obj)
+        x, y = self.origin(obj)
+        return (x, y - h, x + w, y)
+
+    def rebuild(self, objects, version=None):
+        self.grid.clear()
+        for obj in objects:
+            self.grid.insert(id(obj), self._box(obj))
+        self._objects = objects
+        self._version = version
+        self._order = None
+
+    def added(self, objects, obj, version=None):
+        if objects is not self._objects:
+            self.rebuild(objects, version)
+            return
+        self.grid.insert(id(obj), self._box(obj))
+        if self._order is not None:
+            self._order[id(obj)] = len(objects) - 1
+        self._version = version
+
+    def inserted(self, objects, obj, version=None):
+        """obj was inserted somewhere other than the end"""
+        if objects is not self._objects:
+            self.rebuild(objects, version)
+            return
+        self.grid.insert(id(obj), self._box(obj))
+        self._order = None
+        self._version = version
+
+    def changed(self, obj, version=None):
+        if id(obj) in self.grid._boxes:
+            self.grid.insert(id(obj), self._box(obj))
+        self._version = version
+
+    def removed(self, obj, version=None):
+        self.grid.remove(id(obj))
+        self._order = None
+        self._version = version
+
+    def hit(self, objects, x, y, version=None):
+        """List index of the topmost (last drawn) object at (x, y), or -1"""
+        if objects is not self._objects or version != self._version:
+            self.rebuild(objects, version)
+        keys = self.grid.query(x, y)
+        if not keys:
+            return -1
+        if self._order is None:
+            self._order = {id(obj): i for i, obj in enumerate(objects)}
+        return max(self._order[key] for key in keys)
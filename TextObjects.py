@@ -0,0 +1,121 @@
+# TextObjects.py
+
+
+class TextObject:
+    """One placed string. Slotted: no per-object dict, no per-object selected flag."""
+    __slots__ = ('text', 'position', 'color', 'font', 'scale', 'thickness')
+
+    def __init__(self, text, position, color, font, scale, thickness):
+        self.text = text
+        self.position = position
+        self.color = color
+        self.font = font
+        self.scale = scale
+        self.thickness = thickness
+
+    def pack(self):
+        """Flat tuple of plain values, for snapshots and saving"""
+        return (self.text, self.position[0], self.position[1], self.color,
+                self.font, self.scale, self.thickness)
+
+    @classmethod
+    def unpack(cls, values):
+        text, x, y, color, font, scale, thickness = values
+        return cls(text, (x, y), tuple(color), font, scale, thickness)
+
+
+class TextObjectStore:
+    """Ordered text objects (last is drawn on top) with one selected index.
+
+    All changes go through the store so the selection index and the
+    hit-test index (a TextHitIndex) stay in step: selected lookup is O(1)
+    and hit tests never re-measure text. `version` counts the changes, so
+    the hit-test index can tell if it missed one.
+    """
+
+    def __init__(self, index):
+        self.items = []
+        self.selected = -1
+        self.index = index
+        self.version = 0
+        index.rebuild(self.items, self.version)
+
+    def _bump(self):
+        self.version += 1
+        return self.version
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, i):
+        return self.items[i]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    # --------- Selection ----------
+    def select(self, i):
+        self.selected = i if 0 <= i < len(self.items) else -1
+
+    def clear_selection(self):
+        self.selected = -1
+
+    @property
+    def selected_object(self):
+        return self.items[self.selected] if self.selected >= 0 else None
+
+    # --------- Changes ----------
+    def append(self, obj):
+        """Add obj on top and return its index"""
+        self.items.append(obj)
+        self.index.added(self.items, obj, self._bump())
+        return len(self.items) - 1
+
+    def insert(self, i, obj):
+        self.items.insert(i, obj)
+        self.index.inserted(self.items, obj, self._bump())
+        if 0 <= i <= self.selected:
+            self.selected += 1
+
+    def pop(self, i):
+        obj = self.items.pop(i)
+        self.index.removed(obj, self._bump())
+        if self.selected == i:
+            self.selected = -1
+        elif self.selected > i:
+            self.selected -= 1
+        return obj
+
+    def find(self, obj, hint=-1):
+        """Position of obj, checking hint first"""
+        if 0 <= hint < len(self.items) and self.items[hint] is obj:
+            return hint
+        return self.items.index(obj)
+
+    def set_text(self, obj, text):
+        obj.text = text
+        self.index.changed(obj, self._bump())
+
+    def set_position(self, obj, position):
+        obj.position = position
+        self.index.changed(obj, self._bump())
+
+    def clear(self):
+        self.items.clear()
+        self.selected = -1
+        self.index.rebuild(self.items, self._bump())
+
+    # --------- Queries ----------
+    def hit(self, x, y):
+        """Position of the topmost object containing (x, y), or -1"""
+        return self.index.hit(self.items, x, y, self.version)
+
+    # --------- Snapshots ----------
+    def snapshot(self):
+        return (self.selected, tuple(obj.pack() for obj in self.items))
+
+    def restore(self, snapshot):
+        selected, packed = snapshot
+        self.items[:] = [TextObject.unpack(values) for values in packed]
+        self.index.rebuild(self.items, self._bump())
+        self.select(selected)
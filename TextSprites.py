@@ -0,0 +1,136 @@
+# TextSprites.py
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+class TextSprite:
+    """A pre-rendered string: BGR pixels plus the mask of pixels putText touched"""
+    __slots__ = ('image', 'mask', 'dx', 'dy', 'size')
+
+    def __init__(self, image, mask, dx, dy, size):
+        self.image = image
+        self.mask = mask
+        self.dx = dx            # sprite top-left relative to the text origin
+        self.dy = dy
+        self.size = size        # cv2.getTextSize() (w, h) of the fill text
+
+
+class TextSpriteCache:
+    """Render each distinct text (with its outline) once and blit it afterwards.
+
+    Sprites are keyed by everything that changes the pixels (text, font,
+    scale, colors, thicknesses), so edits just produce a new key; the least
+    recently used sprites are dropped past `capacity`. putText is drawn
+    without anti-aliasing, so copying the sprite through its mask gives the
+    same pixels as drawing the text directly.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self._sprites = OrderedDict()
+        self._sizes = OrderedDict()
+        self.rendered = 0
+
+    def text_size(self, text, font, scale, thickness):
+        """Cached cv2.getTextSize(...)[0]"""
+        key = (text, font, scale, thickness)
+        size = self._sizes.get(key)
+        if size is None:
+            size = cv2.getTextSize(text, font, scale, thickness)[0]
+            self._sizes[key] = size
+            if len(self._sizes) > self.capacity:
+                self._sizes.popitem(last=False)
+        return size
+
+    def get(self, text, font, scale, color, thickness, outline_color=None, outline_thickness=0):
+        key = (text, font, scale, color, thickness, outline_color, outline_thickness)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            return sprite
+        sprite = self._render(*key)
+        self._sprites[key] = sprite
+        if len(self._sprites) > self.capacity:
+            self._sprites.popitem(last=False)
+        return sprite
+
+    def _render(self, text, font, scale, color, thickness, outline_color, outline_thickness):
+        (w, h), baseline = cv2.getTextSize(text, font, scale, max(thickness, outline_thickness))
+        pad = max(thickness, outline_thickness) + 2
+        ox, oy = pad, pad + h
+        image = np.zeros((h + baseline + 2 * pad, w + 2 * pad, 3), np.uint8)
+        mask = np.zeros(image.shape[:2], np.uint8)
+        if outline_color is not None and outline_thickness:
+            cv2.putText(image, text, (ox, oy), font, scale, outline_color, outline_thickness)
+            cv2.putText(mask, text, (ox, oy), font, scale, 255, outline_thickness)
+        cv2.putText(image, text, (ox, oy), font, scale, color, thickness)
+        cv2.putText(mask, text, (ox, oy), font, scale, 255, thickness)
+        self.rendered += 1
+        return TextSprite(image, mask, -ox, -oy, self.text_size(text, font, scale, thickness))
+
+    @staticmethod
+    def blit(img, sprite, position):
+        """Copy sprite onto img with its text origin at position (clipped to img)"""
+        x0, y0 = position[0] + sprite.dx, position[1] + sprite.dy
+        sh, sw = sprite.mask.shape
+        h, w = img.shape[:2]
+        cx0, cy0 = max(0, x0), max(0, y0)
+        cx1, cy1 = min(w, x0 + sw), min(h, y0 + sh)
+        if cx0 >= cx1 or cy0 >= cy1:
+            return
+        sx, sy = cx0 - x0, cy0 - y0
+        region = img[cy0:cy1, cx0:cx1]
+        cv2.copyTo(sprite.image[sy:sy + cy1 - cy0, sx:sx + cx1 - cx0],
+                   sprite.mask[sy:sy + cy1 - cy0, sx:sx + cx1 - cx0], region)
+
+
+class GlyphAdvances:
+    """Prefix widths of a string from per-character advances.
+
+    For Hershey fonts getTextSize(text)[0][0] is round(sum of advance *
+    scale, accumulated in order, + thickness). Advances are measured once
+    per character, and the running sums for the last string are kept and
+    extended or cut as characters are typed or deleted, so the width of
+    any prefix is a lookup.
+    """
+
+    def __init__(self, font, scale):
+        self.font = font
+        self.scale = scale
+        self._advances = {}
+        self._text = ""
+        self._prefix = [0.0]    # _prefix[i]: width of _text[:i] without thickness
+
+    def advance(self, ch):
+        adv = self._advances.get(ch)
+        if adv is None:
+            # At scale 1 and thickness 1 the width is exactly advance + 1
+            adv = cv2.getTextSize(ch, self.font, 1.0, 1)[0][0] - 1
+            self._advances[ch] = adv
+        return adv
+
+    def _sync(self, text):
+        if text == self._text:
+            return
+        if text.startswith(self._text):
+            start = len(self._text)
+        elif self._text.startswith(text):
+            del self._prefix[len(text) + 1:]
+            self._text = text
+            return
+        else:
+            start = 0
+            del self._prefix[1:]
+        width = self._prefix[-1]
+        for ch in text[start:]:
+            width += self.advance(ch) * self.scale
+            self._prefix.append(width)
+        self._text = text
+
+    def prefix_width(self, text, pos, thickness):
+        """cv2.getTextSize(text[:pos], font, scale, thickness)[0][0]"""
+        self._sync(text)
+        pos = max(0, min(pos, len(text)))
+        return int(round(self._prefix[pos] + thickness))
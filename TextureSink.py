@@ -0,0 +1,55 @@
+# TextureSink.py
+import time
+
+import numpy as np
+
+
+class TextureSink:
+    """Push BGR frames into a Kivy Image through one reused texture.
+
+    The texture is created once per resolution and flipped through its UV
+    coordinates, so frames are uploaded straight from the numpy buffer:
+    no cv2.flip, no tobytes(), no per-frame Texture.create(). Kivy's
+    blit_buffer() takes a 1-D byte buffer, so each frame is passed as a
+    flat view of a C-contiguous array (copied into a reused buffer first
+    if it isn't contiguous).
+    """
+
+    def __init__(self, image_widget):
+        self.widget = image_widget
+        self.texture = None
+        self._buf = None          # only used when a frame isn't contiguous
+        self.textures_created = 0
+        self.timings = {'prepare': 0.0, 'upload': 0.0}
+
+    def _create_texture(self, w, h):
+        from kivy.graphics.texture import Texture
+        texture = Texture.create(size=(w, h), colorfmt='bgr')
+        # numpy rows go top-down, GL rows bottom-up
+        texture.flip_vertical()
+        return texture
+
+    def frame_buffer(self, img):
+        """Flat, zero-copy byte view of img (via a reused copy if img isn't C-contiguous)"""
+        if not img.flags['C_CONTIGUOUS']:
+            if self._buf is None or self._buf.shape != img.shape:
+                self._buf = np.empty(img.shape, np.uint8)
+            np.copyto(self._buf, img)
+            img = self._buf
+        return memoryview(img).cast('B')
+
+    def show(self, img):
+        t0 = time.perf_counter()
+        h, w = img.shape[:2]
+        if self.texture is None or self.texture.size != (w, h):
+            self.texture = self._create_texture(w, h)
+            self.textures_created += 1
+            self.widget.texture = self.texture
+        buf = self.frame_buffer(img)
+        t1 = time.perf_counter()
+        self.texture.blit_buffer(buf, colorfmt='bgr', bufferfmt='ubyte')
+        # Same texture object, so tell the Image its content changed
+        self.widget.canvas.ask_update()
+        t2 = time.perf_counter()
+        self.timings['prepare'] = t1 - t0
+        self.timings['upload'] = t2 - t1
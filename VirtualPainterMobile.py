@@ -1,8 +1,8 @@
 # VirtualPainterMobile.py
 import os
 import time
+from collections import deque
 import cv2
-import numpy as np
 from kivy.uix.screenmanager import Screen
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.image import Image
@@ -10,13 +10,23 @@ from kivy.uix.button import Button
 from kivy.uix.togglebutton import ToggleButton
 from kivy.uix.slider import Slider
 from kivy.uix.label import Label
-from kivy.graphics.texture import Texture
-from kivy.clock import Clock
 from kivy.core.window import Window
 from kivy.metrics import dp
 
 # Optional (your module must be present beside these files)
 import HandTrackingModule as htm
+from BufferPool import FramePool
+from CameraModule import FrameGrabber
+from FramePacer import FramePacer
+from GuideLibrary import GuideLibrary
+from PerfMonitor import PerfMonitor
+from StrokeCanvas import StrokeCanvas
+from TextHistory import TextHistory
+from TextIndex import TextHitIndex
+from TextObjects import TextObject, TextObjectStore
+from TextSprites import GlyphAdvances, TextSpriteCache
+from TextureSink import TextureSink
+from Compositor import GuideBlender, OverlayCompositor
 
 # --------------- Text / Keyboard helper (same as your class, trimmed docstrings) ---------------
 class KeyboardInput:
@@ -26,9 +36,7 @@ class KeyboardInput:
         self.cursor_visible = True
         self.cursor_timer = 0
         self.cursor_blink_interval = 0.5
-        self.text_objects = []
         self.dragging = False
-        self.drag_object_index = -1
         self.drag_offset = (0, 0)
         self.default_font = cv2.FONT_HERSHEY_SIMPLEX
         self.default_scale = 1.0
@@ -39,19 +47,24 @@ class KeyboardInput:
         self.current_input_position = (640, 360)
         self.input_dragging = False
         self.input_drag_offset = (0, 0)
-        self.selected_object_index = -1
-        self.text_history = []
-        self.history_index = -1
         self.last_key_time = time.time()
         self.key_repeat_delay = 0.03
         self.initial_delay = 0.2
         self.last_key = None
-        self.smooth_text = []
+        self.smooth_text = deque()
         self.text_fade_in = 1.0
         self.touch_point = None
         self.is_touching = False
         self.touch_start_time = 0
         self.touch_threshold = 0.5
+        self.sprites = TextSpriteCache()
+        self.glyphs = GlyphAdvances(cv2.FONT_HERSHEY_SIMPLEX, 1.0)
+        self.text_index = TextHitIndex(
+            lambda obj: self.sprites.text_size(obj.text, obj.font, obj.scale, obj.thickness),
+            lambda obj: obj.position)
+        self.text_objects = TextObjectStore(self.text_index)
+        self.history = TextHistory(depth=100)
+        self.drag_start_position = None
 
     def toggle_keyboard_mode(self):
         self.active = not self.active
@@ -88,12 +101,14 @@ class KeyboardInput:
             return True
         elif key == 8:
             if selected_index >= 0:
-                text = self.text_objects[selected_index]['text']
+                obj = self.text_objects[selected_index]
                 chars_to_delete = 1
                 if time_since_last_key < self.key_repeat_delay:
-                    chars_to_delete = min(3, len(text))
-                self.text_objects[selected_index]['text'] = text[:-chars_to_delete]
-                if not self.text_objects[selected_index]['text']:
+                    chars_to_delete = min(3, len(obj.text))
+                text = obj.text[:-chars_to_delete]
+                if text:
+                    self.edit_text(obj, text)
+                else:
                     self.delete_selected()
             else:
                 chars_to_delete = 1
@@ -103,16 +118,18 @@ class KeyboardInput:
             return True
         elif isinstance(key, int) and 32 <= key <= 126:
             if selected_index >= 0:
-                self.text_objects[selected_index]['text'] += chr(key)
-                self.smooth_text.append({'char': chr(key), 'alpha': 0, 'target_pos': len(self.text_objects[selected_index]['text']) - 1})
+                obj = self.text_objects[selected_index]
+                self.edit_text(obj, obj.text + chr(key))
+                self.smooth_text.append({'char': chr(key), 'alpha': 0, 'target_pos': len(obj.text) - 1})
             else:
                 self.text += chr(key)
                 self.smooth_text.append({'char': chr(key), 'alpha': 0, 'target_pos': len(self.text) - 1})
             return True
         elif isinstance(key, str) and len(key) == 1 and ord(key) >= 32:
             if selected_index >= 0:
-                self.text_objects[selected_index]['text'] += key
-                self.smooth_text.append({'char': key, 'alpha': 0, 'target_pos': len(self.text_objects[selected_index]['text']) - 1})
+                obj = self.text_objects[selected_index]
+                self.edit_text(obj, obj.text + key)
+                self.smooth_text.append({'char': key, 'alpha': 0, 'target_pos': len(obj.text) - 1})
             else:
                 self.text += key
                 self.smooth_text.append({'char': key, 'alpha': 0, 'target_pos': len(self.text) - 1})
@@ -120,51 +137,36 @@ class KeyboardInput:
         return False
 
     def get_selected_index(self):
-        for i, obj in enumerate(self.text_objects):
-            if obj['selected']:
-                return i
-        return -1
+        return self.text_objects.selected
+
+    def new_text_object(self, text, position):
+        return TextObject(text, position, self.default_color, self.default_font,
+                          self.default_scale, self.default_thickness)
 
     def add_text_object(self):
         if not self.text:
             return
-        self.save_state()
-        self.text_objects.append({
-            'text': self.text,
-            'position': self.current_input_position,
-            'color': self.default_color,
-            'font': self.default_font,
-            'scale': self.default_scale,
-            'thickness': self.default_thickness,
-            'selected': False
-        })
+        self.place_text_object(self.new_text_object(self.text, self.current_input_position))
+
+    def place_text_object(self, obj):
+        self.history.added(self.text_objects.append(obj), obj)
+
+    def edit_text(self, obj, text):
+        old = obj.text
+        self.text_objects.set_text(obj, text)
+        self.history.edited(obj, old, text)
 
     def delete_selected(self):
         idx = self.get_selected_index()
         if idx >= 0:
-            self.save_state()
-            del self.text_objects[idx]
+            self.history.deleted(idx, self.text_objects.pop(idx))
             self.clear_selection()
 
-    def save_state(self):
-        if self.history_index < len(self.text_history) - 1:
-            self.text_history = self.text_history[:self.history_index + 1]
-        self.text_history.append([obj.copy() for obj in self.text_objects])
-        self.history_index = len(self.text_history) - 1
-
     def undo(self):
-        if self.history_index > 0:
-            self.history_index -= 1
-            self.text_objects = [obj.copy() for obj in self.text_history[self.history_index]]
-            return True
-        return False
+        return self.history.undo(self.text_objects) is not None
 
     def redo(self):
-        if self.history_index < len(self.text_history) - 1:
-            self.history_index += 1
-            self.text_objects = [obj.copy() for obj in self.text_history[self.history_index]]
-            return True
-        return False
+        return self.history.redo(self.text_objects) is not None
 
     def update(self, dt):
         if not self.active:
@@ -173,20 +175,24 @@ class KeyboardInput:
         if self.cursor_timer >= self.cursor_blink_interval:
             self.cursor_timer = 0
             self.cursor_visible = not self.cursor_visible
-        for char_data in self.smooth_text[:]:
+        # Same fade rate for every character, so they finish in typing order
+        for char_data in self.smooth_text:
             char_data['alpha'] = min(1.0, char_data['alpha'] + dt * 5)
-            if char_data['alpha'] >= 1.0:
-                self.smooth_text.remove(char_data)
+        while self.smooth_text and self.smooth_text[0]['alpha'] >= 1.0:
+            self.smooth_text.popleft()
 
     def draw(self, img):
         # existing objects
+        selected = self.text_objects.selected
         for i, obj in enumerate(self.text_objects):
-            cv2.putText(img, obj['text'], obj['position'], obj['font'], obj['scale'], (0, 0, 0), 4)
-            cv2.putText(img, obj['text'], obj['position'], obj['font'], obj['scale'], obj['color'], obj['thickness'])
-            if obj['selected']:
-                text_size = cv2.getTextSize(obj['text'], obj['font'], obj['scale'], obj['thickness'])[0]
-                tl = (obj['position'][0] - 5, obj['position'][1] - text_size[1] - 5)
-                br = (obj['position'][0] + text_size[0] + 5, obj['position'][1] + 5)
+            # Outline + fill rendered once per distinct text, then blitted
+            sprite = self.sprites.get(obj.text, obj.font, obj.scale, obj.color,
+                                      obj.thickness, (0, 0, 0), 4)
+            self.sprites.blit(img, sprite, obj.position)
+            if i == selected:
+                text_size = sprite.size
+                tl = (obj.position[0] - 5, obj.position[1] - text_size[1] - 5)
+                br = (obj.position[0] + text_size[0] + 5, obj.position[1] + 5)
                 cv2.rectangle(img, tl, br, (0, 255, 0), 2)
 
         # current input
@@ -196,65 +202,63 @@ class KeyboardInput:
                 pos = char_data['target_pos']
                 alpha = char_data['alpha']
                 color = tuple(int(c * alpha) for c in (255, 255, 255))
-                text_before = base_text[:pos]
-                text_size = cv2.getTextSize(text_before, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)[0]
-                char_pos = (self.current_input_position[0] + text_size[0], self.current_input_position[1])
+                text_width = self.glyphs.prefix_width(base_text, pos, 2)
+                char_pos = (self.current_input_position[0] + text_width, self.current_input_position[1])
                 cv2.putText(img, char_data['char'], char_pos, cv2.FONT_HERSHEY_SIMPLEX, 1.0, color, 2)
 
-            cv2.putText(img, self.text, self.current_input_position, cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+            sprite = self.sprites.get(self.text, cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+            self.sprites.blit(img, sprite, self.current_input_position)
 
             if self.cursor_visible:
-                text_size = cv2.getTextSize(self.text, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)[0]
+                text_size = sprite.size
                 cursor_pos = (self.current_input_position[0] + text_size[0], self.current_input_position[1])
                 cv2.line(img, cursor_pos, (cursor_pos[0], cursor_pos[1] - 30), (255, 255, 255), 2)
 
     def check_drag_start(self, x, y):
-        for i, obj in enumerate(reversed(self.text_objects)):
-            idx = len(self.text_objects) - 1 - i
-            text_size = cv2.getTextSize(obj['text'], obj['font'], obj['scale'], obj['thickness'])[0]
-            left, right = obj['position'][0], obj['position'][0] + text_size[0]
-            top, bottom = obj['position'][1] - text_size[1], obj['position'][1]
-            if (left <= x <= right and top <= y <= bottom):
-                for other in self.text_objects: other['selected'] = False
-                self.text_objects[idx]['selected'] = True
-                self.drag_object_index = idx
-                self.drag_offset = (x - obj['position'][0], y - obj['position'][1])
-                self.dragging = True
-                self.active = True
-                self.text = obj['text']
-                self.current_input_position = obj['position']
-                return True
+        # Topmost text object under (x, y), from the grid index
+        idx = self.text_objects.hit(x, y)
+        if idx >= 0:
+            obj = self.text_objects[idx]
+            self.text_objects.select(idx)
+            self.history.end_edit()
+            self.drag_offset = (x - obj.position[0], y - obj.position[1])
+            self.drag_start_position = obj.position
+            self.dragging = True
+            self.active = True
+            self.text = obj.text
+            self.current_input_position = obj.position
+            return True
         if self.active and (self.text or self.cursor_visible):
-            text_size = cv2.getTextSize(self.text, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)[0]
+            text_size = self.sprites.text_size(self.text, cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)
             left, right = self.current_input_position[0], self.current_input_position[0] + text_size[0]
             top, bottom = self.current_input_position[1] - text_size[1], self.current_input_position[1]
             if (left <= x <= right and top <= y <= bottom):
                 self.input_dragging = True
                 self.input_drag_offset = (x - self.current_input_position[0], y - self.current_input_position[1])
                 return True
-        for obj in self.text_objects:
-            obj['selected'] = False
-        self.drag_object_index = -1
+        self.text_objects.clear_selection()
+        self.history.end_edit()
         return False
 
     def update_drag(self, x, y):
         if self.input_dragging:
             self.current_input_position = (x - self.input_drag_offset[0], y - self.input_drag_offset[1])
-        elif self.dragging and self.drag_object_index >= 0:
+        elif self.dragging and self.text_objects.selected >= 0:
+            # The selected object is the one being dragged
             new_pos = (x - self.drag_offset[0], y - self.drag_offset[1])
-            self.text_objects[self.drag_object_index]['position'] = new_pos
+            self.text_objects.set_position(self.text_objects.selected_object, new_pos)
             self.current_input_position = new_pos
 
     def end_drag(self):
-        if self.input_dragging or self.dragging:
-            self.save_state()
+        obj = self.text_objects.selected_object
+        if self.dragging and obj is not None:
+            self.history.moved(obj, self.drag_start_position, obj.position)
         self.input_dragging = False
         self.dragging = False
-        self.drag_object_index = -1
 
     def clear_selection(self):
-        for obj in self.text_objects: obj['selected'] = False
-        self.drag_object_index = -1
+        self.text_objects.clear_selection()
+        self.history.end_edit()
         self.text = ""
 
 # --------------- Painter Screen ---------------
@@ -267,38 +271,56 @@ class VirtualPainterScreen(Screen):
         self.brushSize = 15
         self.eraserSize = 40
         self.drawColor = (255, 0, 255)  # Pink
-        self.detector = htm.handDetector(detectionCon=0.85)
-        self.xp, self.yp = 0, 0
-        self.imgCanvas = np.zeros((600, 1024, 3), np.uint8)
-        self.undoStack, self.redoStack = [], []
+        # Frame buffers shared by capture, detection and compositing
+        self.pool = FramePool()
+        self.frame_allocations = 0
+        self.detector = htm.asyncHandDetector(
+            detectionCon=0.85, infer_size=(512, 300), pool=self.pool,
+            scheduler=htm.AdaptiveScheduler(target_fps=30), extrapolate=True,
+            landmarkFilter=lambda: htm.OneEuroFilter(minCutoff=1.5, beta=5.0, lead=0.02))
+        # Strokes are the source of truth; imgCanvas is their raster cache
+        self.strokes = StrokeCanvas(1024, 600)
+        self.compositor = OverlayCompositor(threshold=50, pool=self.pool)
         self.show_guide = False
         self.current_guide_index = 0
-        self.guideList = []
-        self.cap = None
-        self.use_kivy_camera = False
-        self.camera_widget = None
+        # Listed on the first "Show Guide", decoded in the background
+        self.guides = GuideLibrary(os.path.join('assets', 'guide'), size=(1024, 600))
+        self.guide_blender = GuideBlender(alpha=0.3)
+        self.grabber = FrameGrabber(1024, 600, pool=self.pool)
         self.is_drawing = False
         self.fingers = [0, 0, 0, 0, 0]
         self.dragging_text = False
-        self.selected_text_index = -1
+        self.drag_hand_id = None
         self.keyboard = KeyboardInput()
 
+        self._last_frame = None
+        # Set by UI changes (keys, buttons, sliders) that need a redraw even
+        # when no camera frame arrives
+        self._ui_dirty = False
+        # Per-stage timings; set VP_METRICS_LOG to a path to get JSON lines
+        self.show_stats = False
+        self.perf = PerfMonitor(export_path=os.environ.get('VP_METRICS_LOG'),
+                                context=self._metrics_context)
+        self._perf_result_id = 0
+        # Update loop: driven by new camera frames and detection results,
+        # capped at 30 FPS; idle while the screen isn't shown
+        self.pacer = FramePacer(self._update, target_fps=30)
+        self.grabber.on_frame = self.pacer.notify
+        self.detector.on_result = self.pacer.notify
+        self.guides.on_loaded = self._request_redraw
+
         # UI
         self._build_ui()
-        # Guides
-        self._load_guides()
-        # Camera init
-        self._init_camera()
-        # Keyboard events
-        Window.bind(on_key_down=self._on_keyboard_down)
-        # Update loop
-        Clock.schedule_interval(self._update, 1.0 / 30.0)  # 30 FPS
 
     # --------- Public API ---------
     def set_user(self, user_type, username):
         self.user_type = user_type
         self.username = username
 
+    @property
+    def imgCanvas(self):
+        return self.strokes.canvas
+
     # --------- UI ----------
     def _build_ui(self):
         main_layout = BoxLayout(orientation='horizontal', padding=5, spacing=5)
@@ -310,12 +332,14 @@ class VirtualPainterScreen(Screen):
         brush_slider = Slider(min=5, max=50, value=self.brushSize, size_hint=(1, 0.07))
         brush_slider.bind(value=lambda inst, val: setattr(self, 'brushSize', int(val)))
         brush_slider.bind(value=lambda inst, val: setattr(brush_label, 'text', f"Brush: {int(val)}"))
+        brush_slider.bind(value=self._request_redraw)
         left.add_widget(brush_label); left.add_widget(brush_slider)
         # Eraser
         eraser_label = Label(text=f"Eraser: {self.eraserSize}", size_hint=(1, 0.07))
         eraser_slider = Slider(min=10, max=100, value=self.eraserSize, size_hint=(1, 0.07))
         eraser_slider.bind(value=lambda inst, val: setattr(self, 'eraserSize', int(val)))
         eraser_slider.bind(value=lambda inst, val: setattr(eraser_label, 'text', f"Eraser: {int(val)}"))
+        eraser_slider.bind(value=self._request_redraw)
         left.add_widget(eraser_label); left.add_widget(eraser_slider)
         # Guide
         left.add_widget(Label(text="Guide Controls", size_hint=(1, 0.06)))
@@ -336,15 +360,19 @@ class VirtualPainterScreen(Screen):
         trow.add_widget(undo_t); trow.add_widget(redo_t)
         left.add_widget(trow)
         del_text = Button(text="Delete Text", size_hint=(1, 0.06))
-        del_text.bind(on_press=lambda *_: self.keyboard.delete_selected())
+        del_text.bind(on_press=lambda *_: self._delete_text())
         left.add_widget(del_text)
-        left.add_widget(Label(size_hint=(1, 0.25)))  # spacer
+        stats_btn = Button(text="Show Stats", size_hint=(1, 0.06))
+        stats_btn.bind(on_press=self._toggle_stats)
+        left.add_widget(stats_btn)
+        left.add_widget(Label(size_hint=(1, 0.19)))  # spacer
 
         main_layout.add_widget(left)
 
         # Right panel
         right = BoxLayout(orientation='vertical', size_hint=(0.82, 1), padding=5, spacing=5)
         self.camera_display = Image(size_hint=(1, 0.85))
+        self.display = TextureSink(self.camera_display)
         right.add_widget(self.camera_display)
 
         controls = BoxLayout(size_hint=(1, 0.15), spacing=3)
@@ -354,6 +382,7 @@ class VirtualPainterScreen(Screen):
                           ('Eraser', (0, 0, 0))]:
             b = ToggleButton(text=name, group='colors')
             b.bind(on_press=lambda inst, c=val: setattr(self, 'drawColor', c))
+            b.bind(on_press=self._request_redraw)
             colors_layout.add_widget(b)
 
         tools_layout = BoxLayout(size_hint=(0.4, 1), orientation='vertical', spacing=3)
@@ -375,73 +404,90 @@ class VirtualPainterScreen(Screen):
 
     # --------- Guides ----------
     def _load_guides(self):
-        guide_path = os.path.join('assets', 'guide')
-        if os.path.exists(guide_path) and os.path.isdir(guide_path):
-            try:
-                files = sorted([f for f in os.listdir(guide_path) if f.lower().endswith(('.png', '.jpg', '.jpeg'))])
-                for f in files:
-                    img = cv2.imread(os.path.join(guide_path, f))
-                    if img is not None:
-                        img = cv2.resize(img, (1024, 600))
-                        self.guideList.append(img)
-            except Exception as e:
-                print(f"Error loading guides: {e}")
+        if not self.guides.scanned:
+            self.guides.scan()
+        return len(self.guides)
 
     def _toggle_guide(self, btn):
-        if self.guideList:
+        if self._load_guides():
             self.show_guide = not self.show_guide
             btn.text = "Hide Guide" if self.show_guide else "Show Guide"
+            if self.show_guide:
+                self.guides.get(self.current_guide_index)
+                self.guides.prefetch(self.current_guide_index + 1)
+            self._request_redraw()
 
     def _next_guide(self, *_):
-        if self.guideList and self.show_guide:
-            self.current_guide_index = (self.current_guide_index + 1) % len(self.guideList)
+        if len(self.guides) and self.show_guide:
+            self.current_guide_index = (self.current_guide_index + 1) % len(self.guides)
+            self.guides.get(self.current_guide_index)
+            self.guides.prefetch(self.current_guide_index + 1)
+            self._request_redraw()
 
     def _toggle_keyboard(self, btn):
         self.keyboard.toggle_keyboard_mode()
         btn.text = "Hide Keyboard" if self.keyboard.active else "Show Keyboard"
+        self._request_redraw()
+
+    def _toggle_stats(self, btn):
+        self.show_stats = not self.show_stats
+        btn.text = "Hide Stats" if self.show_stats else "Show Stats"
+        self._request_redraw()
+
+    def _request_redraw(self, *_):
+        """Something on screen changed outside the camera/detector loop"""
+        self._ui_dirty = True
+        self.pacer.notify()
 
     # --------- Keyboard ----------
     def _on_keyboard_down(self, window, key, scancode, codepoint, modifiers):
         # On Android, physical keyboard might not exist; soft keyboard events come via TextInput typically.
         # This still supports desktop testing.
         if codepoint:
-            key_code = ord(codepoint)
-            return self.keyboard.process_key_input(key_code)
+            handled = self.keyboard.process_key_input(ord(codepoint))
         elif key == 8:
-            return self.keyboard.process_key_input(8)
+            handled = self.keyboard.process_key_input(8)
         elif key == 13:
-            return self.keyboard.process_key_input(13)
+            handled = self.keyboard.process_key_input(13)
         elif key == 27:
             self.keyboard.active = False
-            return True
-        return False
+            handled = True
+        else:
+            return False
+        if handled:
+            self._request_redraw()
+        return handled
 
     def _text_undo(self):
         if self.keyboard.undo():
             idx = self.keyboard.get_selected_index()
             if idx >= 0:
-                self.keyboard.text = self.keyboard.text_objects[idx]['text']
-                self.keyboard.current_input_position = self.keyboard.text_objects[idx]['position']
+                obj = self.keyboard.text_objects[idx]
+                self.keyboard.text = obj.text
+                self.keyboard.current_input_position = obj.position
+            self._request_redraw()
 
     def _text_redo(self):
         if self.keyboard.redo():
             idx = self.keyboard.get_selected_index()
             if idx >= 0:
-                self.keyboard.text = self.keyboard.text_objects[idx]['text']
-                self.keyboard.current_input_position = self.keyboard.text_objects[idx]['position']
+                obj = self.keyboard.text_objects[idx]
+                self.keyboard.text = obj.text
+                self.keyboard.current_input_position = obj.position
+            self._request_redraw()
+
+    def _delete_text(self):
+        self.keyboard.delete_selected()
+        self._request_redraw()
 
     # --------- Drawing stacks ----------
     def _undo(self):
-        if self.undoStack:
-            self.redoStack.append({'canvas': self.imgCanvas.copy()})
-            state = self.undoStack.pop()
-            self.imgCanvas = state['canvas'].copy()
+        if self.strokes.undo():
+            self._request_redraw()
 
     def _redo(self):
-        if self.redoStack:
-            self.undoStack.append({'canvas': self.imgCanvas.copy()})
-            state = self.redoStack.pop()
-            self.imgCanvas = state['canvas'].copy()
+        if self.strokes.redo():
+            self._request_redraw()
 
     def _save_canvas(self):
         combined = self.imgCanvas.copy()
@@ -454,145 +500,183 @@ class VirtualPainterScreen(Screen):
         print(f"Saved: {path}")
 
     def _clear_canvas(self):
-        self.undoStack.append({'canvas': self.imgCanvas.copy()})
-        self.imgCanvas = np.zeros((600, 1024, 3), np.uint8)
-        self.keyboard.text_objects = []
-        self.keyboard.text_history = []
-        self.keyboard.history_index = -1
+        self.strokes.clear()
+        self.keyboard.text_objects.clear()
+        self.keyboard.history.clear()
         self.keyboard.text = ""
+        self._request_redraw()
 
     # --------- Camera ----------
     def _init_camera(self):
-        # Try OpenCV first
-        try:
-            cap = cv2.VideoCapture(0)
-            if not cap or not cap.isOpened():
-                raise RuntimeError("cv2 camera not available")
-            cap.set(3, 1024); cap.set(4, 600)
-            self.cap = cap
-            self.use_kivy_camera = False
-            print("Using OpenCV VideoCapture")
-            return
-        except Exception as e:
-            print(f"OpenCV camera failed: {e}")
-
-        # Fallback to Kivy Camera
-        try:
-            from kivy.uix.camera import Camera
-            self.camera_widget = Camera(play=True, resolution=(1024, 600))
-            # We won't add the widget directly (we use our own Image for compositing),
-            # but we keep it hidden offscreen—Kivy will still fill the texture.
-            self.camera_widget.opacity = 0
-            self.add_widget(self.camera_widget)
-            self.use_kivy_camera = True
-            print("Using Kivy Camera fallback")
-        except Exception as e:
-            print(f"Kivy Camera fallback failed: {e}")
+        # Capture runs in its own stage; _update only picks up the newest frame
+        if self.grabber.camera_widget is not None:
+            # Re-entering the screen: the Kivy path builds a fresh Camera
+            self.remove_widget(self.grabber.camera_widget)
+        if self.grabber.start() and self.grabber.camera_widget is not None:
+            # Kivy only fills the Camera texture while it is in the widget tree
+            self.add_widget(self.grabber.camera_widget)
 
     def _get_frame(self):
-        """Return a BGR image (1024x600) or None."""
-        if self.cap is not None:
-            ok, img = self.cap.read()
-            if not ok: return None
-            img = cv2.flip(img, 1)
-            img = cv2.resize(img, (1024, 600))
-            return img
-        if self.use_kivy_camera and self.camera_widget and self.camera_widget.texture:
-            tex = self.camera_widget.texture
-            # texture is RGBA; convert to numpy array
-            w, h = tex.size
-            # tex.pixels is bytes in RGBA
-            buf = tex.pixels  # length w*h*4
-            frame = np.frombuffer(buf, dtype=np.uint8).reshape(h, w, 4)
-            frame = cv2.cvtColor(frame, cv2.COLOR_RGBA2BGR)
-            frame = cv2.flip(frame, 1)
-            if (w, h) != (1024, 600):
-                frame = cv2.resize(frame, (1024, 600))
-            return frame
-        return None
-
-    # --------- Main update loop ----------
-    def _update(self, dt):
-        img = self._get_frame()
-        if img is None:
+        """Return the newest BGR image (1024x600), or None if nothing new arrived."""
+        return self.grabber.read()
+
+    # --------- Hands ----------
+    def _handle_hand(self, hand):
+        hid = hand['id']
+        lm, fingers = hand['lm'], hand['fingers']
+        # Rows are [id, x, y]; cast to Python ints for cv2 drawing calls
+        x1, y1 = int(lm[8, 1]), int(lm[8, 2])  # index finger tip
+
+        # Two fingers up -> drag text (one hand at a time)
+        if fingers[1] and fingers[2]:
+            self.strokes.end_stroke(hid)
+            if self.drag_hand_id is None:
+                if self.keyboard.check_drag_start(x1, y1):
+                    self.dragging_text = True
+                    self.drag_hand_id = hid
+            if self.drag_hand_id == hid:
+                self.keyboard.update_drag(x1, y1)
             return
 
-        # Hand tracking
-        img_proc = self.detector.findHands(img, draw=False)
-        lmList = self.detector.findPosition(img, draw=False)
-
-        if lmList and len(lmList) >= 21:
-            # Fix: Get coordinates correctly from lmList
-            x1, y1 = lmList[8][1], lmList[8][2]  # index finger tip
-            x2, y2 = lmList[12][1], lmList[12][2]  # middle finger tip
-            
-            self.fingers = self.detector.fingersUp()
-
-            # Two fingers up -> drag text
-            if self.fingers[1] and self.fingers[2]:
-                if not self.dragging_text:
-                    if self.keyboard.check_drag_start(x1, y1):
-                        self.dragging_text = True
-                        self.selected_text_index = self.keyboard.drag_object_index
-                if self.dragging_text:
-                    self.keyboard.update_drag(x1, y1)
-                    self.is_drawing = False
-                    self.xp, self.yp = 0, 0
-
-            # One finger up -> draw
-            elif self.fingers[1] and not self.fingers[2]:
-                self.dragging_text = False
-                self.selected_text_index = -1
-                self.keyboard.end_drag()
-
-                if not self.is_drawing:
-                    self.is_drawing = True
-                    self.undoStack.append({'canvas': self.imgCanvas.copy()})
-                    self.redoStack = []
-
-                if self.xp == 0 and self.yp == 0:
-                    self.xp, self.yp = x1, y1
+        if self.drag_hand_id == hid:
+            self._release_drag()
 
+        # One finger up -> draw
+        if fingers[1] and not fingers[2]:
+            if not self.strokes.is_drawing(hid):
                 if self.drawColor == (0, 0, 0):
-                    cv2.line(self.imgCanvas, (self.xp, self.yp), (x1, y1), self.drawColor, self.eraserSize)
+                    self.strokes.begin_stroke(hid, self.drawColor, self.eraserSize, 'eraser')
                 else:
-                    cv2.line(self.imgCanvas, (self.xp, self.yp), (x1, y1), self.drawColor, self.brushSize)
+                    self.strokes.begin_stroke(hid, self.drawColor, self.brushSize)
+            self.strokes.add_point(hid, x1, y1)
+        else:
+            self.strokes.end_stroke(hid)
 
-                self.xp, self.yp = x1, y1
+    def _release_drag(self):
+        self.dragging_text = False
+        self.drag_hand_id = None
+        self.keyboard.end_drag()
 
-            else:
-                self.is_drawing = False
-                self.dragging_text = False
-                self.selected_text_index = -1
-                self.keyboard.end_drag()
-                self.xp, self.yp = 0, 0
+    # --------- Main update loop ----------
+    def _track_hands(self, img):
+        # Hand tracking: every detected hand draws/drags on its own
+        if self.detector.result_id != self._perf_result_id:
+            # Inference ran on the worker thread; record what it took
+            self._perf_result_id = self.detector.result_id
+            self.perf.record('inference', self.detector.inference_latency)
+        hands = self.detector.findAllHands(img)
+        self.perf.lap('landmarks')
+        for hand in hands:
+            self._handle_hand(hand)
+        if hands:
+            self.fingers = hands[0]['fingers']
+
+        # End strokes of hands the detector has stopped tracking
+        for hid in self.strokes.active_keys():
+            if hid not in self.detector.activeIds:
+                self.strokes.end_stroke(hid)
+        if self.drag_hand_id is not None and self.drag_hand_id not in self.detector.activeIds:
+            self._release_drag()
+        self.is_drawing = self.strokes.drawing
+        self.perf.lap('strokes')
 
+    def _update(self, dt):
         # Update keyboard animations
         self.keyboard.update(dt)
 
-        # Composite canvas onto camera
-        imgGray = cv2.cvtColor(self.imgCanvas, cv2.COLOR_BGR2GRAY)
-        _, imgInv = cv2.threshold(imgGray, 50, 255, cv2.THRESH_BINARY_INV)
-        imgInv = cv2.cvtColor(imgInv, cv2.COLOR_GRAY2BGR)
-        img_out = cv2.bitwise_and(img, imgInv)
-        img_out = cv2.bitwise_or(img_out, self.imgCanvas)
+        img = self._get_frame()
+        if img is None:
+            # Woken by a detection result between camera frames: apply it to
+            # the strokes now, it shows up with the next frame
+            if self._last_frame is not None and self.detector.poll():
+                self.perf.start()
+                self._track_hands(self._last_frame)
+                self.perf.end_frame('result')
+            if self._ui_dirty and self._camera_idle():
+                # No camera frame is coming to show the change: draw it on
+                # a blank background
+                self.perf.start()
+                self._render(self._blank_frame())
+            return
+        self._last_frame = img
+        self.perf.start()
+        # Capture and preprocessing happen on the grabber thread; 'capture'
+        # is the latency from the camera frame to this update picking it up
+        self.perf.record('preprocess', self.grabber.preprocess_time)
+        self.perf.record('capture', self.grabber.preprocess_time + self.grabber.last_frame_age)
+        # Buffers allocated since the last frame; 0 once the pipeline is warm
+        self.frame_allocations = self.pool.next_frame()
+        if img.shape[:2] != self.imgCanvas.shape[:2]:
+            # Frame size changed: re-render the strokes at the new resolution
+            self.strokes.resize(img.shape[1], img.shape[0])
+
+        # Results carry the capture time, so staleness() includes capture and queueing
+        self.detector.findHands(img, draw=False, timestamp=self.grabber.last_frame_time)
+        self.perf.lap('submit')
+        self._track_hands(img)
+        self._render(img)
+
+    def _camera_idle(self, timeout=0.5):
+        """True if no camera frame has been delivered for `timeout` seconds"""
+        return not self.grabber.last_frame_time or self.grabber.frame_age() > timeout
+
+    def _blank_frame(self):
+        frame = self.pool.get('ui.blank', self.imgCanvas.shape)
+        frame[...] = 0
+        return frame
+
+    def _render(self, img):
+        """Draw strokes, text, guide and stats over img and show it"""
+        self._ui_dirty = False
+        # Composite canvas onto camera (in place, only where something is drawn)
+        self.compositor.update(self.imgCanvas, self.strokes.take_dirty())
+        img_out = self.compositor.composite(img, self.imgCanvas)
+        self.perf.lap('composite')
 
         # Draw keyboard text on output
         self.keyboard.draw(img_out)
-
-        # Guide overlay
-        if self.show_guide and self.guideList:
-            guide = self.guideList[self.current_guide_index]
-            img_out = cv2.addWeighted(img_out, 0.7, guide, 0.3, 0)
-
-        # Send to Kivy Image (BGR->BGR expected, flipped vertically)
-        buf = cv2.flip(img_out, 0).tobytes()
-        texture = Texture.create(size=(img_out.shape[1], img_out.shape[0]), colorfmt='bgr')
-        texture.blit_buffer(buf, colorfmt='bgr', bufferfmt='ubyte')
-        self.camera_display.texture = texture
+        self.perf.lap('text')
+
+        # Guide overlay (skipped for the few frames a guide is still loading)
+        guide = self.guides.get(self.current_guide_index) if self.show_guide else None
+        if guide is not None:
+            self.guide_blender.apply(img_out, guide)
+            self.perf.lap('guide')
+
+        if self.show_stats:
+            self.perf.draw_hud(img_out)
+            self.perf.lap('hud')
+
+        # Send to Kivy Image (reused texture, flipped via UVs)
+        self.display.show(img_out)
+        self.perf.lap('upload')
+        self.perf.end_frame()
+        if self.keyboard.active:
+            # Keep the cursor blinking and typed characters fading in even
+            # without camera frames
+            self._request_redraw()
+
+    def _metrics_context(self):
+        return {'camera': self.grabber.stats(), 'pacer': self.pacer.stats(),
+                'frame_allocations': self.frame_allocations,
+                'staleness_ms': self.detector.staleness() * 1000.0}
+
+    def on_enter(self, *_):
+        self._init_camera()
+        self.detector.start()
+        Window.bind(on_key_down=self._on_keyboard_down)
+        self._ui_dirty = True
+        self.pacer.resume()
 
     def on_leave(self, *_):
-        # Stop camera if leaving screen
-        if self.cap and self.cap.isOpened():
-            self.cap.release()
-        Window.unbind(on_key_down=self._on_keyboard_down)
\ No newline at end of file
+        # Idle while hidden: no updates, no capture, no detector worker
+        self.shutdown()
+        Window.unbind(on_key_down=self._on_keyboard_down)
+
+    def shutdown(self):
+        """Stop updates, capture, the detector worker and metrics export"""
+        self.pacer.pause()
+        self.grabber.stop()
+        self.detector.close()
+        self._last_frame = None
+        self.perf.close()
\ No newline at end of file
@@ -309,5 +309,9 @@ class BeyondTheBrushApp(App):
         sm.current = 'loading'
         return sm
 
+    def on_stop(self):
+        # Stop the painter's camera and detector threads on exit
+        self.root.get_screen('painter').shutdown()
+
 if __name__ == '__main__':
     BeyondTheBrushApp().run()
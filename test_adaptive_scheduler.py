@@ -0,0 +1,56 @@
+# test_adaptive_scheduler.py
+from HandTrackingModule import AdaptiveScheduler
+
+
+def run(scheduler, times, results):
+    """Feed `results` inference times (per model complexity); return the model switches"""
+    switches = 0
+    for _ in range(results):
+        model = scheduler.model_complexity
+        scheduler.update_latency(times[model])
+        switches += scheduler.model_complexity != model
+    return switches
+
+
+def test_steps_down_under_load():
+    s = AdaptiveScheduler(target_fps=30)
+    # 50 ms fits neither model at every frame, but does every 2nd frame
+    run(s, {1: 0.05, 0: 0.05}, 500)
+    assert s.LEVELS[s.level] == (0, 2)
+
+
+def test_steps_back_up_with_headroom():
+    s = AdaptiveScheduler(target_fps=30)
+    run(s, {1: 0.2, 0: 0.2}, 500)
+    assert s.level == len(s.LEVELS) - 1
+    run(s, {1: 0.01, 0: 0.005}, 500)
+    assert s.level == 0
+
+
+def test_no_full_lite_oscillation():
+    # Full model misses the budget, lite fits with room to spare
+    s = AdaptiveScheduler(target_fps=30, retry=10 ** 6)
+    assert run(s, {1: 0.04, 0: 0.02}, 1000) == 1
+    assert s.level == 1
+    # With retries the full model is only probed once per `retry` results
+    s = AdaptiveScheduler(target_fps=30, retry=900)
+    assert run(s, {1: 0.04, 0: 0.02}, 2000) <= 5
+
+
+def test_full_model_comes_back_once_it_fits():
+    s = AdaptiveScheduler(target_fps=30, retry=300)
+    run(s, {1: 0.04, 0: 0.02}, 200)
+    assert s.level == 1
+    # Load dropped: the retry measures the full model again and it stays
+    run(s, {1: 0.015, 0: 0.008}, 600)
+    assert s.level == 0
+
+
+def test_never_skips_while_moving_fast():
+    s = AdaptiveScheduler(target_fps=30, slow_speed=0.5)
+    run(s, {1: 0.2, 0: 0.2}, 500)
+    assert s.interval == 3
+    s.update_motion(2.0)
+    assert all(s.should_infer() for _ in range(100))
+    s.update_motion(0.1)
+    assert sum(s.should_infer() for _ in range(99)) == 33
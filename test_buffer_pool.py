@@ -0,0 +1,40 @@
+# test_buffer_pool.py
+import numpy as np
+
+from BufferPool import FramePool
+
+
+def test_same_key_and_shape_reuses_buffer():
+    pool = FramePool()
+    a = pool.get('detect.rgb', (48, 64, 3))
+    b = pool.get('detect.rgb', (48, 64, 3))
+    assert a is b
+    assert pool.allocations == 1
+    assert pool.nbytes == 48 * 64 * 3
+
+
+def test_shape_or_dtype_change_reallocates():
+    pool = FramePool()
+    a = pool.get('buf', (10, 10))
+    b = pool.get('buf', (20, 10))
+    c = pool.get('buf', (20, 10), np.float32)
+    assert a is not b and b is not c
+    assert c.dtype == np.float32
+    assert pool.allocations == 3
+    # Only the latest buffer per key is kept
+    assert pool.nbytes == 20 * 10 * 4
+
+
+def test_next_frame_counts_allocations_per_frame():
+    pool = FramePool()
+    pool.get('a', (4, 4))
+    pool.get('b', (4, 4))
+    assert pool.next_frame() == 2
+    for _ in range(5):
+        pool.get('a', (4, 4))
+        pool.get('b', (4, 4))
+        assert pool.next_frame() == 0
+    pool.get('a', (8, 4))
+    assert pool.next_frame() == 1
+    assert pool.last_frame_allocations == 1
+    assert pool.allocations == 3
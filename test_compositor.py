@@ -0,0 +1,80 @@
+# test_compositor.py
+import cv2
+import numpy as np
+
+from Compositor import GuideBlender, OverlayCompositor
+
+W, H = 320, 240
+
+
+def baseline_composite(img, canvas):
+    """The original full-frame gray/threshold/bitwise chain"""
+    gray = cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY)
+    _, inv = cv2.threshold(gray, 50, 255, cv2.THRESH_BINARY_INV)
+    inv = cv2.cvtColor(inv, cv2.COLOR_GRAY2BGR)
+    out = cv2.bitwise_and(img, inv)
+    return cv2.bitwise_or(out, canvas)
+
+
+def random_frame(rng):
+    return rng.integers(0, 256, (H, W, 3), dtype=np.uint8)
+
+
+def test_incremental_composite_matches_baseline():
+    rng = np.random.default_rng(1)
+    canvas = np.zeros((H, W, 3), np.uint8)
+    comp = OverlayCompositor()
+    comp.update(canvas, None)
+    img = random_frame(rng)
+    assert np.array_equal(comp.composite(img.copy(), canvas), baseline_composite(img, canvas))
+
+    for n in range(40):
+        x, y = int(rng.integers(0, W)), int(rng.integers(0, H))
+        r = int(rng.integers(2, 25))
+        # Dark colors stay below the threshold and must be OR-ed, not copied
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        cv2.circle(canvas, (x, y), r, color, -1)
+        dirty = (max(0, x - r - 1), max(0, y - r - 1), min(W, x + r + 2), min(H, y + r + 2))
+        comp.update(canvas, dirty)
+        img = random_frame(rng)
+        assert np.array_equal(comp.composite(img.copy(), canvas), baseline_composite(img, canvas))
+
+
+def test_clear_resets_content_box():
+    canvas = np.zeros((H, W, 3), np.uint8)
+    comp = OverlayCompositor()
+    comp.update(canvas, None)
+    assert comp.content is None
+    cv2.rectangle(canvas, (10, 20), (30, 40), (255, 255, 255), -1)
+    comp.update(canvas, (10, 20, 31, 41))
+    assert comp.content == (10, 20, 31, 41)
+    canvas[:] = 0
+    comp.update(canvas, (0, 0, W, H))
+    assert comp.content is None
+    img = np.full((H, W, 3), 7, np.uint8)
+    assert np.array_equal(comp.composite(img.copy(), canvas), img)
+
+
+def test_guide_blend_matches_add_weighted_on_content():
+    rng = np.random.default_rng(2)
+    guide = np.zeros((H, W, 3), np.uint8)
+    cv2.circle(guide, (100, 80), 40, (200, 150, 90), 6)
+    cv2.putText(guide, "guide", (150, 200), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 3)
+    blender = GuideBlender(alpha=0.3)
+    for _ in range(3):
+        img = random_frame(rng)
+        out = blender.apply(img.copy(), guide)
+        expected = cv2.addWeighted(img, 0.7, guide, 0.3, 0)
+        content = guide.max(axis=2) > blender.threshold
+        # The guide's share is rounded once up front, so allow one level of rounding
+        diff = np.abs(out.astype(np.int16) - expected.astype(np.int16))
+        assert diff[content].max() <= 1
+        # Background guide pixels leave the frame untouched
+        assert np.array_equal(out[~content], img[~content])
+
+
+def test_guide_blend_ignores_mismatched_shape():
+    blender = GuideBlender()
+    img = np.full((H, W, 3), 9, np.uint8)
+    guide = np.full((H // 2, W // 2, 3), 255, np.uint8)
+    assert np.array_equal(blender.apply(img.copy(), guide), img)
@@ -0,0 +1,96 @@
+# test_frame_grabber.py
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import CameraModule
+from CameraModule import FrameGrabber
+
+
+class FakeCapture:
+    """VideoCapture stand-in with slow property sets, like V4L2 mode switches"""
+    instances = []
+
+    def __init__(self, src, set_delay=0.0):
+        self.props = {cv2.CAP_PROP_FRAME_WIDTH: 640, cv2.CAP_PROP_FRAME_HEIGHT: 480,
+                      cv2.CAP_PROP_FPS: 30, cv2.CAP_PROP_FOURCC: 0}
+        self.set_delay = set_delay
+        self.released = False
+        self.sets_after_release = 0
+        self.set_calls = 0
+        self.readers = set()
+        FakeCapture.instances.append(self)
+
+    def isOpened(self):
+        return not self.released
+
+    def set(self, prop, value):
+        if self.released:
+            self.sets_after_release += 1
+        self.set_calls += 1
+        time.sleep(self.set_delay)
+        self.props[prop] = value
+        return True
+
+    def get(self, prop):
+        return self.props.get(prop, 0)
+
+    def read(self, out=None):
+        self.readers.add(threading.get_ident())
+        time.sleep(0.002)
+        shape = (int(self.props[cv2.CAP_PROP_FRAME_HEIGHT]), int(self.props[cv2.CAP_PROP_FRAME_WIDTH]), 3)
+        if out is None or out.shape != shape:
+            out = np.empty(shape, np.uint8)
+        out[:] = 1
+        return True, out
+
+    def release(self):
+        self.released = True
+
+
+def make_grabber(monkeypatch, set_delay):
+    FakeCapture.instances = []
+    monkeypatch.setattr(CameraModule.cv2, 'VideoCapture', lambda src: FakeCapture(src, set_delay))
+    return FrameGrabber(160, 120, prefer_kivy=False)
+
+
+def wait_for_frame(grabber, timeout=5.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        frame = grabber.read()
+        if frame is not None:
+            return frame
+        time.sleep(0.005)
+    return None
+
+
+def test_stop_during_probe_leaves_next_capture_alone(monkeypatch):
+    grabber = make_grabber(monkeypatch, set_delay=0.05)
+    assert grabber.start()
+    time.sleep(0.1)          # still probing modes
+    grabber.stop()
+    assert grabber.start()   # waits for the old thread instead of sharing the ring
+    assert wait_for_frame(grabber) is not None
+    first, second = FakeCapture.instances
+    assert first.released and first.sets_after_release == 0
+    assert not second.released
+    assert len(second.readers) == 1
+    grabber.stop()
+    time.sleep(0.05)
+    assert second.released
+
+
+def test_modes_are_probed_once(monkeypatch):
+    grabber = make_grabber(monkeypatch, set_delay=0.0)
+    for _ in range(2):
+        assert grabber.start()
+        assert wait_for_frame(grabber) is not None
+        grabber.stop()
+    first, second = FakeCapture.instances
+    assert grabber.mode['width'] and grabber.mode['height']
+    # Second start: FOURCC, width, height and FPS only
+    assert second.set_calls == 4
+    assert first.set_calls > 20
+    assert second.props[cv2.CAP_PROP_FRAME_WIDTH] == grabber.mode['width']
@@ -0,0 +1,53 @@
+# test_frame_pacer.py
+from FramePacer import FramePacer
+
+
+class FakeClock:
+    def __init__(self):
+        self.scheduled = []
+
+    def schedule_once(self, fn, delay):
+        self.scheduled.append((fn, delay))
+
+    def unschedule(self, fn):
+        self.scheduled = [(f, d) for f, d in self.scheduled if f != fn]
+
+    def run(self):
+        pending, self.scheduled = self.scheduled, []
+        for fn, _ in pending:
+            fn(0)
+
+
+def test_notifications_merge_into_one_update():
+    clock = FakeClock()
+    calls = []
+    pacer = FramePacer(calls.append, clock=clock)
+    pacer.resume()
+    for _ in range(5):
+        pacer.notify()
+    assert len(clock.scheduled) == 1
+    clock.run()
+    assert len(calls) == 1
+    assert pacer.merged == 5   # resume() scheduled the update
+
+
+def test_paused_pacer_schedules_nothing():
+    clock = FakeClock()
+    calls = []
+    pacer = FramePacer(calls.append, clock=clock)
+    pacer.notify()
+    assert not clock.scheduled
+    pacer.resume()
+    pacer.pause()
+    clock.run()
+    assert not calls
+
+
+def test_update_waits_one_interval_after_the_last():
+    clock = FakeClock()
+    pacer = FramePacer(lambda dt: None, target_fps=10, clock=clock)
+    pacer.resume()
+    assert clock.scheduled[0][1] == 0.0
+    clock.run()
+    pacer.notify()
+    assert 0.0 < clock.scheduled[0][1] <= 0.1
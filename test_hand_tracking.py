@@ -0,0 +1,81 @@
+# test_hand_tracking.py
+import numpy as np
+
+from HandTrackingModule import handDetector
+from LandmarkStream import _Results
+
+IMG = np.zeros((480, 640, 3), np.uint8)
+
+
+class FakeDetector(handDetector):
+    """handDetector fed with results directly, no MediaPipe graph"""
+
+    def _createHands(self):
+        return None
+
+    def feed(self, hands, t):
+        self.results = _Results(hands)
+        self.result_time = t
+        return self.findAllHands(IMG)
+
+
+def hand(label, wrist, thumb_left=True, fingers_up=True):
+    """Landmarks with the wrist at `wrist`, thumb tip left/right of its joint"""
+    wx, wy = wrist
+    pts = np.zeros((21, 3), np.float32)
+    pts[:, 0], pts[:, 1] = wx, wy
+    pts[3, :2] = (wx, wy - 0.05)
+    pts[4, :2] = (wx - 0.03 if thumb_left else wx + 0.03, wy - 0.05)
+    for tip in (8, 12, 16, 20):
+        pts[tip - 2, 1] = wy - 0.1
+        pts[tip, 1] = wy - 0.15 if fingers_up else wy - 0.05
+    return (label, 0.9, pts)
+
+
+def ids_by_type(hands):
+    return {h['type']: h['id'] for h in hands}
+
+
+def test_ids_survive_order_swap():
+    det = FakeDetector()
+    first = ids_by_type(det.feed([hand('Left', (0.2, 0.5)), hand('Right', (0.8, 0.5))], 1.0))
+    # Same hands, reported in the other order and slightly moved
+    second = ids_by_type(det.feed([hand('Right', (0.78, 0.52)), hand('Left', (0.22, 0.49))], 1.03))
+    assert first == second
+    assert len(set(first.values())) == 2
+
+
+def test_id_survives_missed_result():
+    det = FakeDetector()
+    hid = det.feed([hand('Right', (0.5, 0.5))], 1.0)[0]['id']
+    assert det.feed([], 1.03) == []
+    assert hid in det.activeIds
+    assert det.feed([hand('Right', (0.52, 0.5))], 1.06)[0]['id'] == hid
+
+
+def test_id_expires_after_max_missed():
+    det = FakeDetector()
+    hid = det.feed([hand('Right', (0.5, 0.5))], 1.0)[0]['id']
+    t = 1.0
+    for _ in range(det.maxMissed + 1):
+        t += 0.03
+        det.feed([], t)
+    assert hid not in det.activeIds
+    assert det.feed([hand('Right', (0.5, 0.5))], t + 0.03)[0]['id'] != hid
+
+
+def test_far_jump_gets_new_id():
+    det = FakeDetector()
+    hid = det.feed([hand('Right', (0.1, 0.5))], 1.0)[0]['id']
+    assert det.feed([hand('Right', (0.9, 0.5))], 1.03)[0]['id'] != hid
+
+
+def test_thumb_direction_depends_on_handedness():
+    det = FakeDetector()
+    right, left = det.feed([hand('Right', (0.7, 0.5), thumb_left=True),
+                            hand('Left', (0.3, 0.5), thumb_left=True)], 1.0)
+    assert right['type'] == 'Right' and left['type'] == 'Left'
+    assert right['fingers'] == [1, 1, 1, 1, 1]
+    assert left['fingers'] == [0, 1, 1, 1, 1]
+    folded = det.feed([hand('Left', (0.3, 0.5), thumb_left=False, fingers_up=False)], 1.03)[0]
+    assert folded['fingers'] == [1, 0, 0, 0, 0]
@@ -0,0 +1,109 @@
+# test_keyboard_input.py
+import numpy as np
+
+from KeyboardInput import KeyboardInput
+
+
+def make_keyboard():
+    kb = KeyboardInput()
+    kb.key_repeat_delay = 0     # every key press counts, however fast
+    kb.active = True
+    return kb
+
+
+def type_text(kb, text):
+    for ch in text:
+        kb.last_key = None
+        kb.process_key_input(ord(ch))
+
+
+def press(kb, key):
+    kb.last_key = None
+    kb.process_key_input(key)
+
+
+def add(kb, text, position):
+    kb.text = text
+    kb.current_input_position = position
+    kb.add_text_object()
+    kb.text = ""
+
+
+def grab(kb, obj):
+    x, y = obj.position
+    assert kb.check_drag_start(x + 2, y - 2)
+
+
+def test_select_edit_and_undo():
+    kb = make_keyboard()
+    add(kb, "hi", (100, 100))
+    obj = kb.text_objects[0]
+    grab(kb, obj)
+    kb.end_drag()
+    assert kb.get_selected_index() == 0
+    type_text(kb, "ya")
+    assert obj.text == "hiya"
+    assert kb.undo()
+    assert obj.text == "hi"
+    assert kb.redo()
+    assert obj.text == "hiya"
+
+
+def test_backspace_to_empty_deletes_with_text():
+    kb = make_keyboard()
+    add(kb, "ab", (100, 100))
+    grab(kb, kb.text_objects[0])
+    kb.end_drag()
+    press(kb, 8)
+    press(kb, 8)
+    assert len(kb.text_objects) == 0
+    assert kb.undo()
+    assert kb.text_objects[0].text == "a"
+    assert kb.undo()
+    assert kb.text_objects[0].text == "ab"
+
+
+def test_delete_uses_selection_after_drag():
+    kb = make_keyboard()
+    add(kb, "one", (100, 100))
+    add(kb, "two", (100, 300))
+    grab(kb, kb.text_objects[1])
+    kb.update_drag(300, 320)
+    kb.end_drag()
+    kb.delete_selected()
+    assert [o.text for o in kb.text_objects] == ["one"]
+    assert kb.get_selected_index() == -1
+    assert kb.undo()
+    assert [o.text for o in kb.text_objects] == ["one", "two"]
+    assert kb.undo()
+    assert kb.text_objects[1].position == (100, 300)
+
+
+def test_undo_keeps_selection_on_the_same_object():
+    kb = make_keyboard()
+    add(kb, "one", (100, 100))
+    add(kb, "two", (100, 300))
+    grab(kb, kb.text_objects[1])
+    kb.end_drag()
+    selected = kb.text_objects.selected_object
+    kb.history.deleted(0, kb.text_objects.pop(0))
+    assert kb.text_objects.selected_object is selected
+    kb.undo()
+    assert kb.text_objects.selected_object is selected
+
+
+def test_draw_marks_only_the_selected_object():
+    kb = make_keyboard()
+    kb.active = False
+    add(kb, "one", (100, 100))
+    add(kb, "two", (100, 300))
+    plain = np.zeros((400, 640, 3), np.uint8)
+    kb.draw(plain)
+    grab(kb, kb.text_objects[1])
+    kb.end_drag()
+    kb.active = False
+    marked = np.zeros_like(plain)
+    kb.draw(marked)
+    changed = np.argwhere((plain != marked).any(axis=2))
+    assert changed[:, 0].min() > 200
+
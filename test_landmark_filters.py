@@ -0,0 +1,47 @@
+# test_landmark_filters.py
+import numpy as np
+import pytest
+
+from HandTrackingModule import KalmanFilter, OneEuroFilter
+
+FILTERS = [OneEuroFilter, KalmanFilter]
+
+
+def constant_velocity(filt, v, seconds=3.0, rate=30.0):
+    x0 = np.random.RandomState(0).rand(21, 2)
+    n = int(seconds * rate)
+    for i in range(n):
+        t = 100.0 + i / rate
+        filt.filter(x0 + v * (t - 100.0), t)
+    return x0 + v * (t - 100.0), t
+
+
+@pytest.mark.parametrize("cls", FILTERS)
+def test_converges_to_true_velocity(cls):
+    v = np.tile([0.3, -0.2], (21, 1))
+    filt = cls()
+    constant_velocity(filt, v)
+    assert np.allclose(filt.velocity, v, atol=1e-3)
+
+
+@pytest.mark.parametrize("cls", FILTERS)
+def test_predict_adds_lead(cls):
+    v = np.tile([0.5, 0.1], (21, 1))
+    filt = cls(lead=0.05)
+    constant_velocity(filt, v)
+    assert np.allclose(filt.predict(0.02), filt.x + filt.velocity * 0.07)
+    assert np.allclose(filt.predict(), filt.x + filt.velocity * 0.05)
+    assert cls().predict(0.1) is None
+
+
+@pytest.mark.parametrize("cls", FILTERS)
+def test_sample_without_time_step_is_ignored(cls):
+    filt = cls()
+    x, t = constant_velocity(filt, np.tile([0.3, 0.3], (21, 1)))
+    state = (filt.x.copy(), filt.velocity.copy(), filt.t)
+    for dt in (0.0, -0.5):
+        out = filt.filter(x + 1.0, t + dt)
+        assert np.array_equal(out, state[0])
+        assert np.array_equal(filt.x, state[0])
+        assert np.array_equal(filt.velocity, state[1])
+        assert filt.t == state[2]
@@ -0,0 +1,48 @@
+# test_landmark_stream.py
+import numpy as np
+
+from LandmarkStream import LandmarkRecorder, _Results, read_stream, replayHandDetector
+
+
+class FakeDetector:
+    def __init__(self):
+        self.results = None
+        self.result_time = 0.0
+
+
+def record(path, frames=6):
+    det = FakeDetector()
+    rng = np.random.RandomState(0)
+    with LandmarkRecorder(path) as rec:
+        for i in range(frames):
+            if i % 3 != 2:
+                pts = rng.rand(21, 3).astype(np.float32)
+                det.results = _Results([('Right', 0.9, pts)])
+                det.result_time = 10.0 + i / 30.0
+            rec.write(det)
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "hands.lms")
+    record(path)
+    records = read_stream(path)
+    assert len(records) == 6
+    assert records[2][1] is None
+    label, score, pts = records[0][1][0]
+    assert label == 'Right' and abs(score - 0.9) < 1e-6
+    assert pts.shape == (21, 3)
+
+
+def test_looped_replay_times_keep_increasing(tmp_path):
+    path = str(tmp_path / "hands.lms")
+    record(path)
+    det = replayHandDetector(path, loop=True)
+    img = np.zeros((60, 80, 3), np.uint8)
+    times = []
+    for _ in range(20):
+        det.findHands(img, draw=False)
+        times.append(det.result_time)
+    steps = np.diff(times)
+    assert (steps >= 0).all()
+    # Every new result is later than the one before, across the wrap too
+    assert len(set(times)) == det.result_id
@@ -0,0 +1,94 @@
+# test_perf_monitor.py
+import json
+
+import numpy as np
+
+import PerfMonitor as pm
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 100.0
+
+    def perf_counter(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+def fake_monitor(monkeypatch, **kwargs):
+    clock = FakeTime()
+    monkeypatch.setattr(pm, 'time', clock)
+    return pm.PerfMonitor(**kwargs), clock
+
+
+def test_laps_and_frame_time(monkeypatch):
+    perf, clock = fake_monitor(monkeypatch)
+    for _ in range(10):
+        perf.start()
+        clock.now += 0.002
+        perf.lap('a')
+        clock.now += 0.003
+        perf.lap('b')
+        perf.end_frame()
+    assert np.allclose(perf.percentiles('a'), 2.0)
+    assert np.allclose(perf.percentiles('b'), 3.0)
+    assert np.allclose(perf.percentiles('frame'), 5.0)
+
+
+def test_fps_counts_time_between_frames(monkeypatch):
+    perf, clock = fake_monitor(monkeypatch)
+    for _ in range(20):
+        perf.start()
+        clock.now += 0.005      # 5 ms of work...
+        perf.end_frame()
+        clock.now += 0.028      # ...then waiting for the next camera frame
+    assert abs(perf.fps() - 1000.0 / 33.0) < 0.01
+
+
+def test_other_work_is_not_a_frame(monkeypatch):
+    perf, clock = fake_monitor(monkeypatch)
+    perf.start()
+    clock.now += 0.004
+    perf.end_frame('result')
+    clock.now += 0.010
+    perf.start()
+    clock.now += 0.001
+    perf.end_frame()
+    assert perf.frames == 1
+    assert np.allclose(perf.percentiles('result'), 4.0)
+    assert np.allclose(perf.percentiles('frame'), 1.0)
+    assert perf.percentiles('interval') is None
+
+
+def test_window_keeps_recent_samples():
+    perf = pm.PerfMonitor(window=4)
+    for ms in (100, 100, 100, 100, 1, 1, 1, 1):
+        perf.record('x', ms / 1000.0)
+    assert np.allclose(perf.percentiles('x'), 1.0)
+    assert perf.summary()['x']['count'] == 8
+
+
+def test_export_writes_json_lines(tmp_path, monkeypatch):
+    path = tmp_path / "metrics.jsonl"
+    perf, clock = fake_monitor(monkeypatch, export_path=str(path), export_interval=1.0,
+                               context=lambda: {'dropped': 3})
+    for _ in range(30):
+        perf.start()
+        clock.now += 0.1
+        perf.end_frame()
+    perf.close()
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert 2 <= len(lines) <= 3
+    assert lines[-1]['dropped'] == 3
+    assert 'frame' in lines[-1]['stages']
+
+
+def test_hud_draws_inside_image():
+    perf = pm.PerfMonitor()
+    perf.record('x', 0.001)
+    img = np.full((120, 200, 3), 200, np.uint8)
+    perf.draw_hud(img)
+    assert img.shape == (120, 200, 3)
+    assert (img != 200).any()
@@ -0,0 +1,107 @@
+# test_stroke_canvas.py
+import random
+
+import numpy as np
+
+from StrokeCanvas import StrokeCanvas
+
+W, H = 320, 200
+
+
+def draw_random(canvas, rng, strokes=30):
+    """Random strokes, erasers and undo/redo; returns the script for replaying"""
+    for n in range(strokes):
+        op = rng.random()
+        if op < 0.15:
+            canvas.undo()
+        elif op < 0.2:
+            canvas.redo()
+        elif op < 0.22:
+            canvas.clear()
+        else:
+            tool = 'eraser' if op > 0.9 else 'brush'
+            color = (0, 0, 0) if tool == 'eraser' else tuple(rng.randrange(1, 256) for _ in range(3))
+            canvas.begin_stroke('hand', color, rng.randrange(2, 20), tool)
+            x, y = rng.randrange(W), rng.randrange(H)
+            for _ in range(rng.randrange(1, 15)):
+                x = min(W - 1, max(0, x + rng.randrange(-30, 31)))
+                y = min(H - 1, max(0, y + rng.randrange(-30, 31)))
+                canvas.add_point('hand', x, y)
+            canvas.end_stroke('hand')
+
+
+def test_undo_redo_matches_full_render():
+    rng = random.Random(3)
+    canvas = StrokeCanvas(W, H)
+    for _ in range(5):
+        draw_random(canvas, rng)
+        assert np.array_equal(canvas.canvas, canvas.render(W, H))
+        while canvas.undo():
+            assert np.array_equal(canvas.canvas, canvas.render(W, H))
+        while canvas.redo():
+            pass
+        assert np.array_equal(canvas.canvas, canvas.render(W, H))
+
+
+def test_undo_all_gives_blank_canvas():
+    canvas = StrokeCanvas(W, H)
+    draw_random(canvas, random.Random(5))
+    while canvas.undo():
+        pass
+    assert not canvas.canvas.any()
+
+
+def test_folded_history_renders_the_same():
+    unbounded = StrokeCanvas(W, H, max_strokes=10 ** 6, max_points=10 ** 9)
+    bounded = StrokeCanvas(W, H, max_strokes=5, max_points=40)
+    draw_random(unbounded, random.Random(7), strokes=80)
+    draw_random(bounded, random.Random(7), strokes=80)
+    assert len(bounded.strokes) <= 5
+    assert np.array_equal(bounded.canvas, unbounded.canvas)
+    assert np.array_equal(bounded.canvas, bounded.render(W, H))
+
+
+def test_undo_depth_is_bounded():
+    canvas = StrokeCanvas(W, H, max_strokes=4)
+    for i in range(10):
+        canvas.begin_stroke(i, (255, 255, 255), 4)
+        canvas.add_point(i, 10 + 20 * i, 20)
+        canvas.add_point(i, 10 + 20 * i, 60)
+        canvas.end_stroke(i)
+    undone = 0
+    while canvas.undo():
+        undone += 1
+    assert undone == 4
+    # The six baked strokes stay on the canvas
+    assert canvas.canvas[40, 10 + 20 * 5].any()
+    assert not canvas.canvas[40, 10 + 20 * 6].any()
+
+
+def test_redo_survives_a_stationary_draw_pose():
+    canvas = StrokeCanvas(W, H)
+    canvas.begin_stroke(0, (255, 0, 0), 6)
+    canvas.add_point(0, 50, 50)
+    canvas.add_point(0, 150, 50)
+    canvas.end_stroke(0)
+    drawn = canvas.canvas.copy()
+    canvas.undo()
+    # Hand still in the draw pose after the undo gesture, not moving
+    canvas.begin_stroke(1, (0, 255, 0), 6)
+    canvas.add_point(1, 100, 150)
+    canvas.add_point(1, 100, 150)
+    assert canvas.redo()
+    assert np.array_equal(canvas.canvas, drawn)
+
+
+def test_new_segment_clears_redo():
+    canvas = StrokeCanvas(W, H)
+    canvas.begin_stroke(0, (255, 0, 0), 6)
+    canvas.add_point(0, 50, 50)
+    canvas.add_point(0, 150, 50)
+    canvas.end_stroke(0)
+    canvas.undo()
+    canvas.begin_stroke(1, (0, 255, 0), 6)
+    canvas.add_point(1, 100, 150)
+    canvas.add_point(1, 120, 150)
+    canvas.end_stroke(1)
+    assert not canvas.redo()
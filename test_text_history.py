@@ -0,0 +1,118 @@
+# test_text_history.py
+import random
+
+from TextHistory import TextHistory
+from TextIndex import TextHitIndex
+from TextObjects import TextObject, TextObjectStore
+
+
+def make_store():
+    index = TextHitIndex(lambda o: (10 * len(o.text), 20), lambda o: o.position)
+    return TextObjectStore(index)
+
+
+def new_object(text, position=(0, 30)):
+    return TextObject(text, position, (255, 255, 255), 0, 1.0, 2)
+
+
+def state(store):
+    return store.snapshot()[1]
+
+
+def test_random_commands_round_trip():
+    rng = random.Random(4)
+    store, history = make_store(), TextHistory(depth=1000)
+    states = [state(store)]
+    for n in range(200):
+        op = rng.random()
+        if op < 0.35 or not len(store):
+            obj = new_object("t%d" % n, (rng.randrange(600), rng.randrange(20, 400)))
+            i = store.append(obj)
+            history.added(i, obj)
+        elif op < 0.55:
+            i = rng.randrange(len(store))
+            history.deleted(i, store.pop(i))
+        elif op < 0.75:
+            obj = store[rng.randrange(len(store))]
+            old = obj.position
+            store.set_position(obj, (old[0] + rng.randrange(1, 40), old[1]))
+            history.moved(obj, old, obj.position)
+        else:
+            obj = store[rng.randrange(len(store))]
+            old = obj.text
+            store.set_text(obj, old + "x")
+            history.edited(obj, old, obj.text)
+            history.end_edit()
+        states.append(state(store))
+
+    for expected in reversed(states[:-1]):
+        assert history.undo(store) is not None
+        assert state(store) == expected
+    assert history.undo(store) is None
+    for expected in states[1:]:
+        assert history.redo(store) is not None
+        assert state(store) == expected
+    assert history.redo(store) is None
+
+
+def test_typing_run_is_one_edit():
+    store, history = make_store(), TextHistory()
+    obj = new_object("a")
+    history.added(store.append(obj), obj)
+    for ch in "bcd":
+        old = obj.text
+        store.set_text(obj, old + ch)
+        history.edited(obj, old, obj.text)
+    assert len(history.undo_log) == 2
+    history.undo(store)
+    assert obj.text == "a" and len(store) == 1
+    history.redo(store)
+    assert obj.text == "abcd"
+
+
+def test_end_edit_starts_a_new_entry():
+    store, history = make_store(), TextHistory()
+    obj = new_object("a")
+    store.append(obj)
+    history.edited(obj, "a", "ab")
+    obj.text = "ab"
+    history.end_edit()
+    history.edited(obj, "ab", "abc")
+    assert len(history.undo_log) == 2
+
+
+def test_undo_add_after_edit_removes_object():
+    store, history = make_store(), TextHistory()
+    obj = new_object("hi")
+    history.added(store.append(obj), obj)
+    store.set_text(obj, "hello")
+    history.edited(obj, "hi", "hello")
+    history.undo(store)
+    assert obj.text == "hi" and len(store) == 1
+    history.undo(store)
+    assert len(store) == 0
+    history.redo(store)
+    history.redo(store)
+    assert len(store) == 1 and store[0].text == "hello"
+
+
+def test_new_entry_clears_redo():
+    store, history = make_store(), TextHistory()
+    obj = new_object("a")
+    history.added(store.append(obj), obj)
+    history.undo(store)
+    other = new_object("b")
+    history.added(store.append(other), other)
+    assert history.redo(store) is None
+
+
+def test_depth_drops_oldest():
+    store, history = make_store(), TextHistory(depth=3)
+    for n in range(5):
+        obj = new_object(str(n))
+        history.added(store.append(obj), obj)
+    undone = 0
+    while history.undo(store) is not None:
+        undone += 1
+    assert undone == 3
+    assert [o.text for o in store] == ["0", "1"]
@@ -0,0 +1,83 @@
+# test_text_index.py
+import random
+
+from TextIndex import TextGrid, TextHitIndex
+
+
+class Box:
+    def __init__(self, x, y, w, h):
+        self.position = (x, y)
+        self.size = (w, h)
+
+
+def make_index():
+    return TextHitIndex(lambda b: b.size, lambda b: b.position, cell=32)
+
+
+def linear_hit(objects, x, y):
+    found = -1
+    for i, b in enumerate(objects):
+        (bx, by), (w, h) = b.position, b.size
+        if bx <= x <= bx + w and by - h <= y <= by:
+            found = i
+    return found
+
+
+def random_box(rng):
+    return Box(rng.randrange(-20, 600), rng.randrange(0, 420), rng.randrange(1, 200), rng.randrange(1, 60))
+
+
+def test_grid_query_matches_boxes():
+    grid = TextGrid(cell=16)
+    grid.insert('a', (0, 0, 40, 10))
+    grid.insert('b', (30, 5, 35, 50))
+    assert sorted(grid.query(32, 8)) == ['a', 'b']
+    assert grid.query(39, 40) == []
+    grid.remove('a')
+    assert grid.query(5, 5) == []
+    assert len(grid) == 1
+
+
+def test_hits_match_linear_scan():
+    rng = random.Random(11)
+    index = make_index()
+    objects = []
+    version = 0
+    for step in range(300):
+        op = rng.random()
+        version += 1
+        if op < 0.5 or not objects:
+            objects.append(random_box(rng))
+            index.added(objects, objects[-1], version)
+        elif op < 0.7:
+            obj = rng.choice(objects)
+            obj.position = (obj.position[0] + rng.randrange(-50, 51), obj.position[1] + rng.randrange(-50, 51))
+            index.changed(obj, version)
+        elif op < 0.85:
+            i = rng.randrange(len(objects))
+            objects.insert(i, random_box(rng))
+            index.inserted(objects, objects[i], version)
+        else:
+            index.removed(objects.pop(rng.randrange(len(objects))), version)
+        for _ in range(20):
+            x, y = rng.randrange(-30, 820), rng.randrange(-10, 500)
+            assert index.hit(objects, x, y, version) == linear_hit(objects, x, y)
+
+
+def test_missed_change_triggers_rebuild():
+    index = make_index()
+    objects = [Box(0, 20, 10, 10), Box(100, 20, 10, 10)]
+    index.rebuild(objects, version=1)
+    assert index.hit(objects, 5, 15, 1) == 0
+    # Same length, contents replaced without a notification
+    objects[0] = Box(200, 20, 10, 10)
+    assert index.hit(objects, 205, 15, 2) == 0
+    assert index.hit(objects, 5, 15, 2) == -1
+
+
+def test_new_list_triggers_rebuild():
+    index = make_index()
+    first = [Box(0, 20, 10, 10)]
+    index.rebuild(first)
+    second = [Box(50, 20, 10, 10)]
+    assert index.hit(second, 55, 15) == 0
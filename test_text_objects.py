@@ -0,0 +1,62 @@
+# test_text_objects.py
+import pickle
+
+from TextIndex import TextHitIndex
+from TextObjects import TextObject, TextObjectStore
+
+
+def make_store():
+    index = TextHitIndex(lambda o: (10 * len(o.text), 20), lambda o: o.position)
+    return TextObjectStore(index)
+
+
+def new_object(text, position=(0, 30)):
+    return TextObject(text, position, (255, 255, 255), 0, 1.0, 2)
+
+
+def test_pack_unpack_round_trip():
+    obj = TextObject("hello", (12, 34), (1, 2, 3), 0, 1.5, 2)
+    packed = obj.pack()
+    assert packed == ("hello", 12, 34, (1, 2, 3), 0, 1.5, 2)
+    copy = TextObject.unpack(pickle.loads(pickle.dumps(packed)))
+    assert copy.pack() == packed
+    assert not hasattr(copy, '__dict__')
+
+
+def test_snapshot_restore():
+    store = make_store()
+    for n in range(5):
+        store.append(new_object("t%d" % n, (50 * n, 30)))
+    store.select(3)
+    snap = store.snapshot()
+    store.clear()
+    assert len(store) == 0 and store.selected == -1
+    store.restore(snap)
+    assert store.snapshot() == snap
+    assert store.selected_object.text == "t3"
+    assert store.hit(152, 25) == 3
+
+
+def test_selection_follows_inserts_and_pops():
+    store = make_store()
+    for n in range(4):
+        store.append(new_object("t%d" % n))
+    store.select(2)
+    selected = store.selected_object
+    store.insert(0, new_object("new"))
+    assert store.selected_object is selected
+    store.pop(0)
+    assert store.selected_object is selected
+    store.pop(store.selected)
+    assert store.selected == -1 and store.selected_object is None
+
+
+def test_version_counts_changes():
+    store = make_store()
+    obj = new_object("a")
+    start = store.version
+    store.append(obj)
+    store.set_text(obj, "ab")
+    store.set_position(obj, (5, 40))
+    store.pop(0)
+    assert store.version == start + 4
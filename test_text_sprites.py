@@ -0,0 +1,61 @@
+# test_text_sprites.py
+import random
+
+import cv2
+import numpy as np
+
+from TextSprites import GlyphAdvances, TextSpriteCache
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def test_blit_matches_put_text():
+    cache = TextSpriteCache()
+    base = np.random.default_rng(3).integers(0, 256, (200, 400, 3), dtype=np.uint8)
+    for text, pos, scale, thickness, outline in [
+        ("Hello", (50, 100), 1.0, 2, 0),
+        ("Outlined", (40, 150), 1.2, 2, 6),
+        ("clipped", (-20, 10), 1.5, 3, 5),
+        ("edge", (360, 195), 1.0, 2, 4),
+    ]:
+        expected = base.copy()
+        if outline:
+            cv2.putText(expected, text, pos, FONT, scale, (0, 0, 0), outline)
+        cv2.putText(expected, text, pos, FONT, scale, (255, 200, 50), thickness)
+        out = base.copy()
+        sprite = cache.get(text, FONT, scale, (255, 200, 50), thickness,
+                           (0, 0, 0) if outline else None, outline)
+        TextSpriteCache.blit(out, sprite, pos)
+        assert np.array_equal(out, expected), text
+
+
+def test_sprites_and_sizes_are_cached():
+    cache = TextSpriteCache(capacity=2)
+    a = cache.get("a", FONT, 1.0, (255, 255, 255), 2)
+    assert cache.get("a", FONT, 1.0, (255, 255, 255), 2) is a
+    assert cache.rendered == 1
+    cache.get("b", FONT, 1.0, (255, 255, 255), 2)
+    cache.get("c", FONT, 1.0, (255, 255, 255), 2)
+    # "a" was the least recently used and got dropped
+    assert cache.get("a", FONT, 1.0, (255, 255, 255), 2) is not a
+    assert cache.text_size("abc", FONT, 1.0, 2) == cv2.getTextSize("abc", FONT, 1.0, 2)[0]
+
+
+def test_prefix_width_matches_get_text_size():
+    rng = random.Random(4)
+    chars = "abcdefghijklmnopqrstuvwxyzABCXYZ0123456789 .,!?-_"
+    for font, scale, thickness in [(FONT, 1.0, 2), (FONT, 0.7, 1), (cv2.FONT_HERSHEY_DUPLEX, 1.3, 3)]:
+        glyphs = GlyphAdvances(font, scale)
+        text = ""
+        for _ in range(120):
+            # Type, delete and occasionally replace the whole string
+            op = rng.random()
+            if op < 0.6:
+                text += rng.choice(chars)
+            elif op < 0.9:
+                text = text[:-1]
+            else:
+                text = "".join(rng.choice(chars) for _ in range(rng.randrange(10)))
+            for pos in range(len(text) + 1):
+                expected = cv2.getTextSize(text[:pos], font, scale, thickness)[0][0]
+                assert glyphs.prefix_width(text, pos, thickness) == expected, (text, pos)
@@ -0,0 +1,69 @@
+# test_texture_sink.py
+import numpy as np
+
+from TextureSink import TextureSink
+
+
+class FakeTexture:
+    def __init__(self, w, h):
+        self.size = (w, h)
+        self.blits = []
+
+    def blit_buffer(self, pbuffer, colorfmt=None, bufferfmt=None):
+        self.blits.append((pbuffer, colorfmt, bufferfmt))
+
+
+class FakeCanvas:
+    def ask_update(self):
+        pass
+
+
+class FakeImage:
+    def __init__(self):
+        self.texture = None
+        self.canvas = FakeCanvas()
+
+
+class FakeSink(TextureSink):
+    def _create_texture(self, w, h):
+        return FakeTexture(w, h)
+
+
+def test_blit_gets_flat_byte_buffer():
+    sink = FakeSink(FakeImage())
+    img = np.random.RandomState(0).randint(0, 256, (48, 64, 3)).astype(np.uint8)
+    sink.show(img)
+    buf, colorfmt, bufferfmt = sink.texture.blits[-1]
+    assert buf.ndim == 1
+    assert len(buf) == 64 * 48 * 3
+    assert buf.format == 'B'
+    assert bytes(buf) == img.tobytes()
+    assert (colorfmt, bufferfmt) == ('bgr', 'ubyte')
+
+
+def test_contiguous_frames_are_not_copied():
+    sink = FakeSink(FakeImage())
+    img = np.zeros((10, 20, 3), np.uint8)
+    sink.show(img)
+    buf = sink.texture.blits[-1][0]
+    img[0, 0, 0] = 7
+    assert buf[0] == 7
+
+
+def test_non_contiguous_frame_is_flattened():
+    sink = FakeSink(FakeImage())
+    full = np.random.RandomState(1).randint(0, 256, (40, 80, 3)).astype(np.uint8)
+    view = full[:, 10:50]
+    sink.show(view)
+    buf = sink.texture.blits[-1][0]
+    assert buf.ndim == 1 and len(buf) == 40 * 40 * 3
+    assert bytes(buf) == np.ascontiguousarray(view).tobytes()
+
+
+def test_texture_reused_until_size_changes():
+    sink = FakeSink(FakeImage())
+    for _ in range(3):
+        sink.show(np.zeros((10, 20, 3), np.uint8))
+    sink.show(np.zeros((12, 20, 3), np.uint8))
+    assert sink.textures_created == 2
+    assert sink.widget.texture is sink.texture